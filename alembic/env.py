@@ -81,15 +81,17 @@ def run_migrations_online() -> None:
     connectable = create_engine(
         url,
         poolclass=pool.NullPool,
-        echo=False,  # 生产建议关闭
     )
 
     with connectable.connect() as connection:
+        # 为本次迁移启用编译缓存，重复结构的 DDL 无需反复编译
+        connection = connection.execution_options(compiled_cache={})
         context.configure(
             connection=connection, target_metadata=target_metadata,
             compare_type=True,            # 自动检测字段类型变化
             compare_server_default=True,  # 自动检测字段默认值变化
             render_as_batch=True,         # 批量模式（对 SQLite/MySQL 友好）
+            transaction_per_migration=True,  # 每个迁移脚本一个事务
         )
 
         with context.begin_transaction():
@@ -0,0 +1,43 @@
+"""add user stats indexes
+
+Revision ID: c4e1a7b9d2f3
+Revises: 4dc35974eb6b
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a7b9d2f3'
+down_revision: Union[str, Sequence[str], None] = '4dc35974eb6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 部分索引：活跃用户计数可走仅索引扫描
+    op.create_index(
+        "ix_users_active",
+        "users",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+    # 按已用配额倒序：top users 的 ORDER BY ... LIMIT 直接取索引前 K 条，无需全表排序
+    op.create_index(
+        "ix_users_used_tokens_desc",
+        "users",
+        [sa.text("used_tokens DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_used_tokens_desc", table_name="users")
+    op.drop_index("ix_users_active", table_name="users", postgresql_where=sa.text("is_active"))
@@ -0,0 +1,33 @@
+"""add chat messages keyset index
+
+Revision ID: e3b8d1f6a9c2
+Revises: c4e1a7b9d2f3
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8d1f6a9c2'
+down_revision: Union[str, Sequence[str], None] = 'c4e1a7b9d2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 会话消息游标分页：按 (session_id, created_at, id) 直接定位，避免 OFFSET 扫描
+    op.create_index(
+        "ix_chat_messages_session_created_id",
+        "chat_messages",
+        ["session_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_chat_messages_session_created_id", table_name="chat_messages")
@@ -1,11 +1,15 @@
+import asyncio
+import hashlib
+import json
 import logging
 import time
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy import select, func
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.depends import get_async_session, get_current_user
+from src.core.database import AsyncSessionLocal
+from src.core.depends import get_async_session, get_current_user, get_queue_depth
 from src.models.user import User, UserRole
 from src.config.settings import settings
 
@@ -16,21 +20,180 @@ except Exception:
     BaseQdrantClient = None
 
 try:
-    import redis
+    from src.utils.redis_client import get_redis
 except Exception:
-    redis = None
+    get_redis = None
+
+try:
+    from src.utils.minio_storage import get_shared_minio_client
+    _MINIO_OK = True
+except Exception:
+    _MINIO_OK = False
+
+try:
+    from prometheus_client import CollectorRegistry, Gauge, generate_latest, CONTENT_TYPE_LATEST
+    _PROM_OK = True
+except Exception:
+    _PROM_OK = False
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
+# 用户聚合统计：单条 SELECT 一次扫描 users 表得到全部汇总值
+USER_TOTALS_STMT = select(
+    func.count().label("total_users"),
+    func.count().filter(User.is_active == True).label("active_users"),
+    func.coalesce(func.sum(User.quota_tokens), 0).label("total_quota"),
+    func.coalesce(func.sum(User.used_tokens), 0).label("total_used"),
+).select_from(User)
+
+
+async def _fetch_user_totals():
+    """在独立的短生命周期会话中执行聚合查询（AsyncSession 不支持同一会话上的并发查询）"""
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(USER_TOTALS_STMT)).one()
+
+
+# Prometheus 指标注册表（进程内只创建一次，数值由后台任务定期刷新，抓取时无需访问数据库）
+METRICS_REFRESH_INTERVAL = 30  # 指标刷新间隔（秒）
+
+if _PROM_OK:
+    REGISTRY = CollectorRegistry()
+    G_TOTAL = Gauge("llm_total_users", "Total users", registry=REGISTRY)
+    G_ACTIVE = Gauge("llm_active_users", "Active users", registry=REGISTRY)
+    G_ACTIVE_RATE = Gauge("llm_active_user_rate", "Active user rate percentage", registry=REGISTRY)
+    G_QUEUE_DEPTH = Gauge("llm_document_queue_depth", "Pending document tasks in the broker queue", registry=REGISTRY)
+else:
+    REGISTRY = None
+
+
+# 纯文本回退格式的指标模板（符合 Prometheus 文本格式，仅需填入三个数值）
+_METRICS_TMPL: bytes = (
+    b"# HELP llm_total_users Total number of users\n"
+    b"# TYPE llm_total_users gauge\n"
+    b"llm_total_users %d\n"
+    b"# HELP llm_active_users Active users\n"
+    b"# TYPE llm_active_users gauge\n"
+    b"llm_active_users %d\n"
+    b"# HELP llm_active_user_rate Active user rate percentage\n"
+    b"# TYPE llm_active_user_rate gauge\n"
+    b"llm_active_user_rate %.2f\n"
+    b"# HELP llm_document_queue_depth Pending document tasks in the broker queue\n"
+    b"# TYPE llm_document_queue_depth gauge\n"
+    b"llm_document_queue_depth %d\n"
+)
+
+# 最近一次刷新得到的指标快照，标准格式和纯文本回退格式共用同一份数据
+_metrics_snapshot = {"total_users": 0, "active_users": 0, "active_rate": 0.0, "queue_depth": 0}
+
+
+async def _refresh_user_metrics() -> None:
+    """从数据库读取用户统计并更新快照和 Gauge"""
+    totals = await _fetch_user_totals()
+    total_users = totals.total_users
+    active_users = totals.active_users
+    active_rate = float(round(active_users / total_users * 100, 2)) if total_users > 0 else 0.0
+
+    _metrics_snapshot.update(
+        total_users=total_users,
+        active_users=active_users,
+        active_rate=active_rate,
+    )
+    if _PROM_OK:
+        G_TOTAL.set(total_users)
+        G_ACTIVE.set(active_users)
+        G_ACTIVE_RATE.set(active_rate)
+
+
+async def _refresh_queue_metrics() -> None:
+    """读取文档任务队列积压数并更新快照和 Gauge"""
+    depth = await get_queue_depth()
+    _metrics_snapshot["queue_depth"] = depth
+    if _PROM_OK:
+        G_QUEUE_DEPTH.set(depth)
+
+
+async def refresh_metrics_loop(interval: float = METRICS_REFRESH_INTERVAL) -> None:
+    """后台任务：周期性刷新指标（由应用 lifespan 启动和取消）"""
+    while True:
+        for refresh in (_refresh_user_metrics, _refresh_queue_metrics):
+            try:
+                await refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to refresh metrics via {refresh.__name__}: {e}", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+# /admin/usage 结果缓存：仪表盘轮询频繁，数秒内的数据延迟可以接受
+USAGE_CACHE_TTL = 5  # 缓存有效期（秒）
+_usage_cache: Optional[Tuple[float, dict, str]] = None  # (写入时间, 响应数据, ETag)
+_usage_lock = asyncio.Lock()
+
+
+async def _compute_usage(db: AsyncSession) -> dict:
+    """查询用户配额使用情况"""
+    # top users by usage
+    top_stmt = select(User.id, User.username, User.used_tokens, User.quota_tokens).order_by(User.used_tokens.desc()).limit(10)
+
+    # 聚合统计与 top users 查询相互独立，并发执行
+    totals, top_res = await asyncio.gather(
+        _fetch_user_totals(),
+        db.execute(top_stmt),
+    )
+
+    # count 与 COALESCE(SUM(...), 0) 均不会返回 NULL，且列为 Integer，无需再做 int() 转换
+    total_users = totals.total_users
+    active_users = totals.active_users
+    total_quota = totals.total_quota
+    total_used = totals.total_used
+
+    # mappings() 直接产出类字典的行，按列名取值
+    top_users = [
+        {"id": str(r["id"]), "username": r["username"], "used_tokens": r["used_tokens"], "quota_tokens": r["quota_tokens"]}
+        for r in top_res.mappings().all()
+    ]
+
+    return {
+        "total_users": total_users,
+        "active_users": active_users,
+        "total_quota": total_quota,
+        "total_used": total_used,
+        "top_users": top_users,
+    }
+
+
+async def _get_usage(db: AsyncSession) -> Tuple[dict, str]:
+    """返回缓存的使用情况及其 ETag，过期时重新查询（加锁避免并发请求重复查询）"""
+    global _usage_cache
+    cached = _usage_cache
+    if cached is not None and time.monotonic() - cached[0] < USAGE_CACHE_TTL:
+        return cached[1], cached[2]
+
+    async with _usage_lock:
+        cached = _usage_cache
+        if cached is not None and time.monotonic() - cached[0] < USAGE_CACHE_TTL:
+            return cached[1], cached[2]
+
+        payload = await _compute_usage(db)
+        etag = '"' + hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=8).hexdigest() + '"'
+        _usage_cache = (time.monotonic(), payload, etag)
+        return payload, etag
+
+
 @router.get("/usage")
 async def admin_usage(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
     """管理员查看用户配额使用情况（需 admin 权限）
 
+    结果在进程内缓存 5 秒，并返回 ETag；客户端携带 If-None-Match 且数据未变化时返回 304。
+
     返回示例：
     ```
     {
@@ -45,112 +208,140 @@ async def admin_usage(
     if not current_user or getattr(current_user, "role", None) != UserRole.ADMIN.value:
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
-    try:
-        # 聚合统计
-        total_users_stmt = select(func.count()).select_from(User)
-        active_users_stmt = select(func.count()).select_from(User).where(User.is_active == True)
-        total_quota_stmt = select(func.coalesce(func.sum(User.quota_tokens), 0))
-        total_used_stmt = select(func.coalesce(func.sum(User.used_tokens), 0))
-
-        total_users_res = await db.execute(total_users_stmt)
-        active_users_res = await db.execute(active_users_stmt)
-        total_quota_res = await db.execute(total_quota_stmt)
-        total_used_res = await db.execute(total_used_stmt)
-
-        total_users = int(total_users_res.scalar() or 0)
-        active_users = int(active_users_res.scalar() or 0)
-        total_quota = int(total_quota_res.scalar() or 0)
-        total_used = int(total_used_res.scalar() or 0)
-
-        # top users by usage
-        top_stmt = select(User.id, User.username, User.used_tokens, User.quota_tokens).order_by(User.used_tokens.desc()).limit(10)
-        top_res = await db.execute(top_stmt)
-        top_users = [
-            {"id": str(row.id), "username": row.username, "used_tokens": int(row.used_tokens), "quota_tokens": int(row.quota_tokens)} 
-            for row in top_res.all()
-        ] 
-        
-        return {
-            "total_users": total_users,
-            "active_users": active_users,
-            "total_quota": total_quota,
-            "total_used": total_used,
-            "top_users": top_users,
-        }
-        
-    except Exception as e:
-        logger.error(f"Failed to compute usage: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to compute usage")
+    # 数据库异常由全局 SQLAlchemyError 处理器统一记录并转换为错误响应
+    payload, etag = await _get_usage(db)
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return payload
 
 
 @router.get("/metrics")
-async def prometheus_metrics(response: Response, db: AsyncSession = Depends(get_async_session)):
+async def prometheus_metrics():
     """Prometheus 指标端点
 
-    提供两种格式的监控指标：
+    提供两种格式的监控指标（数值均来自后台任务定期刷新的快照，抓取时不访问数据库）：
     1. 优先使用 prometheus_client 库生成标准 Prometheus 格式
     2. 如果 prometheus_client 不可用，回退到纯文本格式
     """
-    # 尝试使用 prometheus_client 生成标准格式指标
-    try:
-        import prometheus_client
-        from prometheus_client import CollectorRegistry, Gauge, generate_latest
-
-        # 创建指标注册表
-        registry = CollectorRegistry()
-
-        # 从数据库获取基础统计数据
-        total_users = int((await db.execute(select(func.count()).select_from(User))).scalar() or 0)
-        active_users = int((await db.execute(select(func.count()).select_from(User).where(User.is_active == True))).scalar() or 0)
-        active_rate = float(round(active_users / total_users * 100, 2)) if total_users > 0 else 0.0
-
-        # 创建 Gauge 类型的指标
-        g_total = Gauge("llm_total_users", "Total users", registry=registry)
-        g_active = Gauge("llm_active_users", "Active users", registry=registry)
-        g_active_rate = Gauge("llm_active_user_rate", "Active user rate percentage", registry=registry)
-
-        # 设置指标值
-        g_total.set(total_users)
-        g_active.set(active_users)
-        g_active_rate.set(active_rate)
-        
-        # 生成 Prometheus 格式的输出
-        output = generate_latest(registry)
-        response.headers["Content-Type"] = prometheus_client.CONTENT_TYPE_LATEST
-        return Response(content=output, media_type=prometheus_client.CONTENT_TYPE_LATEST)
-
-    except Exception:
-        # 回退方案：生成纯文本格式的指标
+    # 优先使用缓存的注册表生成标准格式指标
+    if _PROM_OK:
         try:
-            # 重新获取统计数据
-            total_users = int((await db.execute(select(func.count()).select_from(User))).scalar() or 0)
-            active_users = int((await db.execute(select(func.count()).select_from(User).where(User.is_active == True))).scalar() or 0)
-            active_rate = float(active_users / total_users * 100) if total_users > 0 else 0.0
-
-            # 构建符合 Prometheus 文本格式的指标
-            lines = [
-                f"# HELP llm_total_users Total number of users",
-                f"# TYPE llm_total_users gauge",
-                f"llm_total_users {total_users}",
-                f"# HELP llm_active_users Active users",
-                f"# TYPE llm_active_users gauge",
-                f"llm_active_users {active_users}",
-                f"# HELP llm_active_user_rate Active user rate percentage",
-                f"# TYPE llm_active_user_rate gauge",
-                f"llm_active_user_rate {active_rate}",
-            ]
-            content = "\n".join(lines) + "\n"
-            response.headers["Content-Type"] = "text/plain; version=0.0.4"
-            return Response(content=content, media_type="text/plain; version=0.0.4")
+            return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
         except Exception as e:
-            # 错误处理：记录日志并返回 HTTP 500
-            logger.error(f"Failed to produce metrics: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail="Failed to produce metrics")
+            logger.error(f"Failed to generate Prometheus metrics, falling back to plain text: {e}", exc_info=True)
+
+    # 回退方案：基于同一份快照生成纯文本格式的指标
+    snapshot = _metrics_snapshot
+    content = _METRICS_TMPL % (
+        snapshot["total_users"], snapshot["active_users"], snapshot["active_rate"], snapshot["queue_depth"]
+    )
+    return Response(content=content, media_type="text/plain; version=0.0.4")
+
+
+HEALTH_CHECK_TIMEOUT = 2.0  # 单项检查超时时间（秒），防止某个后端失联拖慢整个端点
+
+
+async def _check_database(db: AsyncSession):
+    """数据库连接检查"""
+    try:
+        # 执行最轻量的查询测试数据库连通性
+        await db.execute(text("SELECT 1"))
+        return "database", {"status": "ok"}
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}", exc_info=True)
+        return "database", {"status": "fail", "error": str(e)}
+
+
+# 健康检查使用的同步客户端缓存（首次使用时创建，之后跨请求复用已建立的连接）
+_clients: dict = {}
+_clients_lock = asyncio.Lock()
+
+
+async def _get_client(name: str, factory):
+    """懒加载并缓存客户端；构造过程可能涉及网络 I/O，放到线程中执行"""
+    client = _clients.get(name)
+    if client is None:
+        async with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = await asyncio.to_thread(factory)
+                _clients[name] = client
+    return client
+
+
+def _build_qdrant():
+    # 构建客户端参数
+    client_args = {
+        "url": settings.QDRANT_SERVER_URL,
+        "api_key": settings.QDRANT_API_KEY.get_secret_value(),
+        "https": settings.QDRANT_USE_HTTPS,  # 根据URL动态设置
+        "verify": settings.QDRANT_USE_HTTPS,  # HTTPS时启用证书验证
+    }
+    return BaseQdrantClient(**client_args)
+
+
+def _build_minio():
+    # 与文档服务共用同一个客户端及连接池
+    return get_shared_minio_client()
+
+
+async def _check_redis():
+    """Redis 连接检查"""
+    if get_redis is None:
+        return "redis", {"status": "unknown", "note": "redis library not installed"}
+    try:
+        # 异步客户端的 ping 不会阻塞事件循环，连接池由共享客户端复用
+        pong = await get_redis().ping()
+        return "redis", {"status": "ok" if pong else "fail"}
+    except Exception as e:
+        logger.error(f"Redis health check failed: {e}", exc_info=True)
+        return "redis", {"status": "fail", "error": str(e)}
+
+
+async def _check_qdrant():
+    """Qdrant 向量数据库检查"""
+    if BaseQdrantClient is None:
+        return "qdrant", {"status": "unknown", "note": "qdrant-client not installed"}
+    try:
+        client = await _get_client("qdrant", _build_qdrant)
+        # 使用轻量级的get_collections接口检查连通性
+        await asyncio.to_thread(client.get_collections)
+        return "qdrant", {"status": "ok"}
+    except Exception as e:
+        logger.error(f"Qdrant health check failed: {e}", exc_info=True)
+        return "qdrant", {"status": "fail", "error": str(e)}
+
+
+async def _check_minio():
+    """MinIO 对象存储检查"""
+    if not _MINIO_OK:
+        return "minio", {"status": "unknown", "note": "minio client not available"}
+    try:
+        minio_client = await _get_client("minio", _build_minio)
+        # 使用轻量级的bucket_exists接口检查连通性
+        if await asyncio.to_thread(minio_client.client.bucket_exists, settings.MINIO_BUCKET_NAME):
+            return "minio", {"status": "ok"}
+        return "minio", {"status": "fail", "error": "Bucket not accessible"}
+    except Exception as e:
+        logger.error(f"Minio health check failed: {e}", exc_info=True)
+        return "minio", {"status": "fail", "error": str(e)}
+
+
+async def _with_timeout(name: str, check):
+    """为单项检查加上超时保护"""
+    try:
+        return await asyncio.wait_for(check, timeout=HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"{name} health check timed out after {HEALTH_CHECK_TIMEOUT}s")
+        return name, {"status": "fail", "error": "timeout"}
 
 
 @router.get("/health")
 async def health_check(db: AsyncSession = Depends(get_async_session)):
-    """健康检查端点：检查数据库、Redis 和 Qdrant 的连通性
+    """健康检查端点：并发检查数据库、Redis、Qdrant 和 MinIO 的连通性
     
     返回格式：
     ```json
@@ -169,76 +360,20 @@ async def health_check(db: AsyncSession = Depends(get_async_session)):
     report = {"status": "ok", "checks": {}}
     start = time.time()
 
-    # 数据库连接检查
-    try:
-        # 执行简单查询测试数据库连通性
-        await db.execute(select(func.now()))
-        report["checks"]["database"] = {"status": "ok"}
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}", exc_info=True)
-        report["checks"]["database"] = {"status": "fail", "error": str(e)}
-
-    # Redis 连接检查
-    try:
-        if redis is not None:
-            # 优先使用显示配置的Redis主机设置
-            if settings.REDIS_HOST:
-                r = redis.Redis(
-                    host=settings.REDIS_HOST, 
-                    port=settings.REDIS_PORT or 6379, 
-                    db=settings.REDIS_DB or 0,
-                    password=settings.REDIS_PASSWORD.get_secret_value()
-                )
-            else:
-                # 回退到使用Celery的Broker URL
-                broker_url = settings.CELERY_BROKER_URL
-                r = redis.from_url(broker_url)
-            pong = r.ping()
-            report["checks"]["redis"] = {"status": "ok" if pong else "fail"}
-        else:
-            report["checks"]["redis"] = {"status": "unknown", "note": "redis library not installed"}
-    except Exception as e:
-        logger.error(f"Redis health check failed: {e}", exc_info=True)
-        report["checks"]["redis"] = {"status": "fail", "error": str(e)}
-
-    # Qdrant 向量数据库检查
-    try:
-        if BaseQdrantClient is None:
-            report["checks"]["qdrant"] = {"status": "unknown", "note": "qdrant-client not installed"}
-        else:
-            # 构建客户端参数
-            client_args = {
-                "url": settings.QDRANT_SERVER_URL,
-                "api_key": settings.QDRANT_API_KEY.get_secret_value(),
-                "https": settings.QDRANT_SERVER_URL.startswith("https"),  # 根据URL动态设置
-                "verify": settings.QDRANT_SERVER_URL.startswith("https"),  # HTTPS时启用证书验证
-            }
-            client = BaseQdrantClient(**client_args)
-            # 使用轻量级的get_collections接口检查连通性
-            _ = client.get_collections()
-            report["checks"]["qdrant"] = {"status": "ok"}
-    except Exception as e:
-        logger.error(f"Qdrant health check failed: {e}", exc_info=True)
-        report["checks"]["qdrant"] = {"status": "fail", "error": str(e)}
-        
-    try:
-        from src.utils.minio_storage import MinioClient
-        minio_client = MinioClient(
-            endpoint_url=settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ROOT_USER,
-            secret_key=settings.MINIO_ROOT_PASSWORD,
-            secure=settings.MINIO_SECURE,
-            bucket_name=settings.MINIO_BUCKET_NAME
-        )
-        # 使用轻量级的bucket_exists接口检查连通性
-        if minio_client.client.bucket_exists(settings.MINIO_BUCKET_NAME):
-            report["checks"]["minio"] = {"status": "ok"}
-        else:
-            report["checks"]["minio"] = {"status": "fail", "error": "Bucket not accessible"}
-        
-    except Exception as e:
-        logger.error(f"Minio health check failed: {e}", exc_info=True)
-        report["checks"]["minio"] = {"status": "fail", "error": str(e)}
+    # 各项检查相互独立，并发执行，总耗时取决于最慢的一项
+    results = await asyncio.gather(
+        _with_timeout("database", _check_database(db)),
+        _with_timeout("redis", _check_redis()),
+        _with_timeout("qdrant", _check_qdrant()),
+        _with_timeout("minio", _check_minio()),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error(f"Health check raised unexpectedly: {result}")
+            continue
+        name, check = result
+        report["checks"][name] = check
 
     # 计算检查耗时
     elapsed = time.time() - start
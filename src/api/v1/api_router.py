@@ -15,4 +15,4 @@ api_router.include_router(document_jobs.router, tags=["document_jobs"])
 api_router.include_router(tasks.router, tags=["tasks"])
 api_router.include_router(chat.router, tags=["chat"])
 api_router.include_router(sessions.router, tags=["sessions"])
-api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
+api_router.include_router(admin.router, tags=["admin"])
\ No newline at end of file
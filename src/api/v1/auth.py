@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request, status
 from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.exc import SQLAlchemyError
@@ -8,7 +7,7 @@ from pydantic import EmailStr
 
 from src.schemas.user import UserResponse, UserCreate, TokenResponse
 from src.schemas.user import PasswordResetRequest, PasswordResetConfirm, PasswordChangeRequest
-from src.core.depends import get_sync_session, get_async_session, get_user_service
+from src.core.depends import get_user_service
 from src.services.user_service import UserService
 from src.core import security
 from src.models.user import User
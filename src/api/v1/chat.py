@@ -15,11 +15,38 @@ from src.services.chat_service import ChatService
 from src.schemas.chat import QuestionRequest, QuestionResponse
 from src.schemas.session import SessionResponse
 from src.crud.chat import ChatCRUD
+from src.utils.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="", tags=["chat"])
 
+SESSION_MIGRATED_TTL = 24 * 60 * 60  # 会话迁移标记的有效期（秒）
+
+
+async def _mark_session_migration(user_id: UUID, client_id: UUID) -> bool:
+    """
+    尝试设置 (user_id, client_id) 的会话迁移标记
+    - 返回 True：首次设置，需要执行迁移
+    - 返回 False：标记已存在，说明近期已迁移过，可跳过
+    - Redis 不可用时返回 True，退化为每次都执行迁移
+    """
+    try:
+        return bool(await get_redis().set(
+            f"migrated:{user_id}:{client_id}", "1", nx=True, ex=SESSION_MIGRATED_TTL
+        ))
+    except Exception as e:
+        logger.warning(f"Failed to set session migration marker: {e}")
+        return True
+
+
+async def _clear_session_migration(user_id: UUID, client_id: UUID) -> None:
+    """迁移失败时清除标记，保证下次请求会重试迁移"""
+    try:
+        await get_redis().delete(f"migrated:{user_id}:{client_id}")
+    except Exception as e:
+        logger.warning(f"Failed to clear session migration marker: {e}")
+
 @router.post("/ask", response_model=QuestionResponse)
 async def ask_question(
     question: QuestionRequest,
@@ -41,13 +68,17 @@ async def ask_question(
     
     logger.info(f"Received to ask question request")
     
-    if current_user:
-         # 迁移游客会话到登录用户
-        migrated_count = await chat_crud.attach_session_to_user_async(
-            db=db,
-            client_id=client_id,
-            user_id=current_user.id
-        )
+    if current_user and await _mark_session_migration(current_user.id, client_id):
+        # 迁移游客会话到登录用户（同一用户与设备仅在标记过期后才会再次执行）
+        try:
+            migrated_count = await chat_crud.attach_session_to_user_async(
+                db=db,
+                client_id=client_id,
+                user_id=current_user.id
+            )
+        except Exception:
+            await _clear_session_migration(current_user.id, client_id)
+            raise
         if migrated_count > 0:
             logger.info(f"Migrated {migrated_count} sessions to user {current_user.id}")
     
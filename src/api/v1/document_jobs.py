@@ -2,26 +2,115 @@ from fastapi import APIRouter, Depends
 from fastapi import Query
 from fastapi import Request, HTTPException
 from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import UUID
+from uuid import UUID, uuid4
+from typing import Optional
 import logging
 
 from src.models.user import User
-from src.models.document_job import DocumentJobType, DocumentJobStatus
+from src.models.document_job import DocumentJobStatus
 from src.core.depends import get_async_session
 from src.core.depends import get_current_user
+from src.core.depends import check_queue_admission
 from src.crud.document import DocumentCRUD
-from src.crud.document_job import DocumentJobCRUD
+from src.schemas.document_job import dump_job_summaries
+from src.schemas.document_job import DocumentJobsResponse, TraceJobsResponse
+from src.schemas.task import TaskSubmitResponse
+from src.crud.document_job import DocumentJobCRUD, DOC_JOBS_CACHE_NS, TRACE_JOBS_CACHE_NS
+from src.utils import cache
+from src.utils import rate_limit
+from src.utils import task_dispatcher
+from src.utils.redis_client import get_redis
 from src.workers.document import vector_storage
-from src.middleware.request_id import request_id_ctx_var
 
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/document_jobs", tags=["document_jobs"])
 
-@router.post("/vectorize/{doc_id}")
+# CRUD 对象无状态，模块级共享，避免每个请求重复构造
+_document_crud = DocumentCRUD()
+_document_job_crud = DocumentJobCRUD()
+
+# 任务查询缓存有效期（秒）：仍有任务执行中时较短，全部结束后较长（状态变化时会主动失效）
+ACTIVE_CACHE_TTL = 3
+SETTLED_CACHE_TTL = 300
+ACTIVE_JOB_STATUSES = frozenset({
+    DocumentJobStatus.PENDING.value,
+    DocumentJobStatus.RUNNING.value,
+    DocumentJobStatus.RETRYING.value,
+})
+
+# 链路统计使用的状态值，导入时绑定一次
+_STATUS_SUCCESS = DocumentJobStatus.SUCCESS.value
+_STATUS_FAILURE = DocumentJobStatus.FAILURE.value
+_STATUS_RUNNING = DocumentJobStatus.RUNNING.value
+
+# 向量化提交限流：每个用户对同一文档在窗口内的最大提交次数
+VECTORIZE_RATE_LIMIT = 5
+VECTORIZE_RATE_WINDOW = 60  # 秒
+
+
+async def limit_vectorize_submissions(
+    doc_id: UUID,
+    current_user: User = Depends(get_current_user),
+) -> None:
+    """向量化提交限流（在查询数据库和入队之前执行）"""
+    retry_after = await rate_limit.hit(
+        f"ratelimit:vectorize:{current_user.id}:{doc_id}",
+        limit=VECTORIZE_RATE_LIMIT,
+        window=VECTORIZE_RATE_WINDOW,
+    )
+    if retry_after is not None:
+        logger.warning("Vectorize submissions rate limited for user %s, doc %s", current_user.id, doc_id)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many vectorization requests",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+async def _acquire_vectorize_inflight(doc_id: UUID, task_id: str) -> Optional[str]:
+    """
+    以任务 ID 作为值原子地设置文档向量化在途标记
+    :return: 设置成功返回 None；已有任务在途时返回该任务的 ID（Redis 不可用时放行）
+    """
+    client = get_redis()
+    key = vector_storage.vectorize_inflight_key(doc_id)
+    try:
+        for _ in range(2):
+            if await client.set(key, task_id, nx=True, ex=vector_storage.VECTORIZE_INFLIGHT_TTL):
+                return None
+            existing = await client.get(key)
+            if existing is not None:
+                return existing.decode()
+            # 标记恰好在两次操作之间过期，重试一次
+        return None
+    except Exception as e:
+        logger.warning("Failed to set vectorize in-flight marker for %s: %s", doc_id, e)
+        return None
+
+
+_release_script = None
+
+
+async def _release_vectorize_inflight(doc_id: UUID, task_id: str) -> None:
+    """释放在途标记（仅当标记仍属于 task_id 时删除）"""
+    global _release_script
+    try:
+        if _release_script is None:
+            _release_script = get_redis().register_script(vector_storage.VECTORIZE_RELEASE_LUA)
+        await _release_script(keys=[vector_storage.vectorize_inflight_key(doc_id)], args=[task_id])
+    except Exception as e:
+        logger.warning("Failed to clear vectorize in-flight marker for %s: %s", doc_id, e)
+
+
+@router.post(
+    "/vectorize/{doc_id}",
+    response_model=TaskSubmitResponse,
+    status_code=202,
+    dependencies=[Depends(limit_vectorize_submissions), Depends(check_queue_admission)],
+)
 async def vectorize_document(
     doc_id: UUID,
     db: AsyncSession = Depends(get_async_session),
@@ -30,53 +119,57 @@ async def vectorize_document(
     """
     向量化文档（需要优先完成文本提取）
     """
-    logger.info(f"Vectorizing document {doc_id} for user {current_user.id}")
-    
-    request_id = request_id_ctx_var.get()    
+    logger.info("Vectorizing document %s for user %s", doc_id, current_user.id)
     
-    # 验证文档归属
-    documen_crud = DocumentCRUD()
-    doc = await documen_crud.get_by_id_async(db, doc_id, current_user.id)
-    if not doc:
+    # 验证文档归属并检查是否已向量化（单次查询）
+    owned, vectorized = await _document_crud.check_vectorization_status_async(db, doc_id, current_user.id)
+    if not owned:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    # 获取文档处理任务
-    document_job_crud = DocumentJobCRUD()
-    job = await document_job_crud.get_document_job_by_type_async(
-        db=db,
-        doc_id=doc_id, 
-        job_type=DocumentJobType.EMBED_CHUNKS
-    )
-    logger.info(f"Checking job status: job={job}, job_type={job.job_type if job else None}, status={job.status if job else None}")
+    logger.info("Checking job status: doc=%s, vectorized=%s", doc_id, vectorized)
 
     # 检查文档是否已经向量化
-    if job and job.job_type == DocumentJobType.EMBED_CHUNKS and job.status == DocumentJobStatus.SUCCESS.value:
-        logger.warning(f"Document has been vectorized")
+    if vectorized:
+        logger.warning("Document has been vectorized")
         raise HTTPException(status_code=400, detail="Document has been vectorized")  
     else:
-        # 提交向量化任务
-        result = vector_storage.process_document_task.apply_async(
-            args=[{
-                "document": {
-                    "id": str(doc.id),
-                    "user_id": str(current_user.id),
-                },
-                "document_job": {
-                    "id": None,
-                    "stage_order": 0,
-                }      
-            }],
-            headers={"request_id": request_id} if request_id else None,
-        )
+        # 同一文档已有向量化任务在队列或执行中时，不重复提交，直接返回在途任务的 ID
+        task_id = str(uuid4())
+        existing_task_id = await _acquire_vectorize_inflight(doc_id, task_id)
+        if existing_task_id is not None:
+            logger.info("Vectorization already in progress for document %s: %s", doc_id, existing_task_id)
+            return {
+                "task_id": existing_task_id,
+                "status": "IN_PROGRESS",
+                "message": "Document vectorization already in progress"
+            }
+        
+        # 放入投递队列后立即返回，投递失败时释放在途标记
+        sig = vector_storage.process_document_task.si({
+            "document": {
+                "id": str(doc_id),
+                "user_id": str(current_user.id),
+            },
+            "document_job": {
+                "id": None,
+                "stage_order": 0,
+            }
+        })
+        try:
+            task_dispatcher.submit(
+                sig, on_error=lambda: _release_vectorize_inflight(doc_id, task_id), task_id=task_id
+            )
+        except Exception:
+            await _release_vectorize_inflight(doc_id, task_id)
+            raise
 
-        logger.info(f"Document vertorization task submitted")
+        logger.info("Document vertorization task submitted: %s", task_id)
         return {
-            "task_id": result.id,
-            "status": result.status,
+            "task_id": task_id,
+            "status": "PENDING",
             "message": "Document vectorization task submitted"
         }
         
-@router.get("/{doc_id}/jobs")
+@router.get("/{doc_id}/jobs", response_model=DocumentJobsResponse)
 async def get_document_jobs(
     doc_id: UUID, 
     db: AsyncSession = Depends(get_async_session), 
@@ -86,75 +179,71 @@ async def get_document_jobs(
 ):
     """查询文档的所有处理任务（业务视角）"""
     
-    logger.info(f"Getting document jobs for document {doc_id} for user {current_user.id}")
-
-    document_job_crud = DocumentJobCRUD()
-    jobs = await document_job_crud.get_document_jobs_by_doc_id_async(
-        db=db,
-        doc_id=doc_id,
-        limit=limit,
-        skip=skip,
-    )
-    
-    job_list = []
-    for job in jobs:
-        job_info = {
-            "job_id": str(job.id),
-            "job_type": job.job_type.value,
-            "status": job.status,
-            "started_at": job.started_at,
-            "finished_at": job.finished_at,
-            "execution_time": job.get_execution_time(),
-            "error_message": job.error_message,
-        }
-        
-        job_list.append(job_info)
+    logger.info("Getting document jobs for document %s for user %s", doc_id, current_user.id)
+
+    async def load():
+        jobs = await _document_job_crud.get_document_jobs_by_doc_id_async(
+            db=db,
+            doc_id=doc_id,
+            limit=limit,
+            skip=skip,
+        )
         
-    return {"doc_id": doc_id, "jobs": job_list, "limit": limit, "skip": skip}
+        job_list = dump_job_summaries(jobs)
+            
+        return {"doc_id": doc_id, "jobs": job_list, "limit": limit, "skip": skip}
+
+    def ttl(payload: dict) -> int:
+        in_flight = any(job["status"] in ACTIVE_JOB_STATUSES for job in payload["jobs"])
+        return ACTIVE_CACHE_TTL if in_flight else SETTLED_CACHE_TTL
 
+    # 前端会高频轮询任务状态，使用缓存减少数据库查询；任务状态变化时由 Worker 提交后失效
+    return await cache.get_or_load(DOC_JOBS_CACHE_NS, str(doc_id), f"{skip}:{limit}", load, ttl)
 
-@router.get("/trace/{trace_id}")
+
+@router.get("/trace/{trace_id}", response_model=TraceJobsResponse)
 async def get_trace_jobs(
     trace_id: str,
     db: AsyncSession = Depends(get_async_session),
+    limit: int = Query(100, ge=1, le=1000, description="返回记录数量限制"),
+    skip: int = Query(0, ge=0, description="跳过记录数量"),
 ):
     """
     通过 trace_id 查询整个请求链路的所有任务
     
     用于分布式追踪和故障排查
     """
-    document_job_crud = DocumentJobCRUD()
-    jobs = await document_job_crud.get_document_jobs_by_trace_id_async(
-        db=db,
-        trace_id=trace_id,
-    )
+    async def load():
+        # 统计信息由数据库 GROUP BY 聚合，任务列表只取当前页
+        status_counts = await _document_job_crud.get_trace_summary_async(
+            db=db,
+            trace_id=trace_id,
+        )
     
-    if not jobs:
-        raise HTTPException(status_code=404, detail="No jobs found for trace_id")
+        if not status_counts:
+            raise HTTPException(status_code=404, detail="No jobs found for trace_id")
     
-    # 统计信息
-    total = len(jobs)
-    success = sum(1 for j in jobs if j.status == DocumentJobStatus.SUCCESS.value)
-    failure = sum(1 for j in jobs if j.status == DocumentJobStatus.FAILURE.value)
-    running = sum(1 for j in jobs if j.status == DocumentJobStatus.RUNNING.value)
+        jobs = await _document_job_crud.get_document_jobs_by_trace_id_async(
+            db=db,
+            trace_id=trace_id,
+            limit=limit,
+            skip=skip,
+        )
     
-    return {
-        "trace_id": trace_id,
-        "summary": {
-            "total": total,
-            "success": success,
-            "failure": failure,
-            "running": running,
-        },
-        "jobs": [
-            {
-                "job_id": str(job.id),
-                "job_type": job.job_type.value,
-                "status": job.status,
-                "started_at": job.started_at.isoformat() if job.started_at else None,
-                "finished_at": job.finished_at.isoformat() if job.finished_at else None,
-                "execution_time": job.get_execution_time(),
-            }
-            for job in jobs
-        ]
-    }
+        return {
+            "trace_id": trace_id,
+            "summary": {
+                "total": sum(status_counts.values()),
+                "success": status_counts.get(_STATUS_SUCCESS, 0),
+                "failure": status_counts.get(_STATUS_FAILURE, 0),
+                "running": status_counts.get(_STATUS_RUNNING, 0),
+            },
+            "limit": limit,
+            "skip": skip,
+            "jobs": dump_job_summaries(jobs),
+        }
+
+    def ttl(payload: dict) -> int:
+        return ACTIVE_CACHE_TTL if payload["summary"]["running"] else SETTLED_CACHE_TTL
+
+    return await cache.get_or_load(TRACE_JOBS_CACHE_NS, trace_id, f"{skip}:{limit}", load, ttl)
@@ -1,43 +1,39 @@
-from pathlib import Path
 from fastapi import APIRouter, UploadFile, File, Depends
 from fastapi import Query
-from fastapi import Request, HTTPException
-from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from typing import Optional
-from celery import chain
 import logging
 
 from src.models.user import User
 from src.schemas.document import DocumentDetailResponse
 from src.schemas.document import PaginationResponse
 from src.schemas.document import create_pagination_response
-from src.schemas.pagination import create_pagination_response as create_pagination
+from src.core.responses import model_json_response
+from src.schemas.task import TaskSubmitResponse
+from src.schemas.pagination import Pagination
 from src.core.depends import get_async_session
 from src.core.depends import get_current_user
+from src.core.depends import check_queue_admission
 from src.core.depends import get_document_service
-from src.crud.document import DocumentCRUD
+from src.core.depends import get_pagination
 from src.services.document_service import DocumentService
-from src.middleware.request_id import request_id_ctx_var
-from src.workers.document.object_storage import upload_document_task
-from src.workers.document.vector_storage import process_document_task
+from src.utils import task_dispatcher
+from src.workers.document.pipelines import document_ingest_pipeline
 
 logger = logging.getLogger(__name__)
 
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt",
-                      ".md", ".ppt", ".png", ".jpg", ".jpeg"}
-
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 
-@router.post("/")
+@router.post(
+    "/",
+    response_model=TaskSubmitResponse,
+    status_code=202,
+    dependencies=[Depends(check_queue_admission)],
+)
 async def upload_document(
     request: Request,
     upload_file: UploadFile = File(...),
@@ -52,49 +48,37 @@ async def upload_document(
     - 自动执行：文件上传 -> 文本提取 -> 向量化及存储
     - 返回： 任务 ID（用于轮询进度）
     """
-    request_id = request_id_ctx_var.get()
-
     # 上传并处理文档（异常由全局处理器统一处理）
-    logger.info("Document upload request received from user {current_user.id}.")
+    logger.info("Document upload request received from user %s.", current_user.id)
     
-    # 文件预取处理
-    filename, temp_path = await document_service.preprocessing_file(upload_file=upload_file)
+    # 校验文件并流式上传到对象存储
+    upload_info = await document_service.preprocessing_file(upload_file=upload_file, user_id=current_user.id)
     
-    if auto_vectorize:
-        # 提交 Celery 任务链
-        upload_sig = upload_document_task.si(
-            user_id=str(current_user.id),
-            filename=filename,
-            temp_path=str(temp_path)
-        )
-        process_sig = process_document_task.s()  # 接收上一个任务的返回值
-        
-        if request_id:
-            headers = {"request_id": request_id}
-            upload_sig.set(headers=headers)
-            process_sig.set(headers=headers)
-            
-        task_chain = chain(upload_sig, process_sig) 
-        result = task_chain.apply_async()
+    # 构建任务编排（自动向量化时为 上传 -> 处理 的任务链）
+    task_sig = document_ingest_pipeline(
+        user_id=str(current_user.id),
+        upload_info=upload_info,
+        auto_vectorize=auto_vectorize,
+    )
     
-    else:
-        # 仅上传文档，不自动提取文本和向量化
-        # 设置消息 headers、 routing/queue/eta 等任务选项使用 apply_async(...)
-        result = upload_document_task.apply_async(
-            kwargs={
-                "user_id": str(current_user.id),
-                # "doc_id": str(existing_doc.id) if existing_doc else None,
-                "filename": filename,
-                "temp_path": str(temp_path),
-            },
-            headers={"request_id": request_id} if request_id else None,
-        )
+    # 文件已在对象存储中：任务未能投递时删除该对象，避免残留孤儿文件
+    storage_key = upload_info["storage_key"]
+    
+    async def discard_upload() -> None:
+        await document_service.discard_uploaded_file(storage_key)
+    
+    # 放入投递队列后立即返回，由后台消费者调用 apply_async
+    try:
+        task_id = task_dispatcher.submit(task_sig, on_error=discard_upload)
+    except Exception:
+        await discard_upload()
+        raise
           
-    logger.info(f"Document process task submitted: {result.id}.")
+    logger.info("Document process task submitted: %s.", task_id)
     
     return {
-        "task_id": result.id,
-        "status": result.state,
+        "task_id": task_id,
+        "status": "PENDING",
         "message": "Document process task submitted in background."        
     }
 
@@ -103,8 +87,7 @@ async def upload_document(
 async def list_documents(
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
-    page: int = Query(1, ge=1),           # 默认从第一页开始
-    size: int = Query(10, ge=1, le=100),  # 默认每页显示10条，限制最大值，防滥用
+    pagination: Pagination = Depends(get_pagination),
     document_service: DocumentService = Depends(get_document_service),
 ):
     """
@@ -115,18 +98,18 @@ async def list_documents(
     items, total = await document_service.list_documents(
         db=db,
         user=current_user,
-        page=page,
-        size=size
+        pagination=pagination,
     )
     
-    return create_pagination_response(items, total, page, size)
+    return model_json_response(
+        create_pagination_response(items, total, pagination.page, pagination.size)
+    )
 
 
 @router.get("/soft-deleted", response_model=PaginationResponse[DocumentDetailResponse])
 async def list_documents_with_soft_deleted(
     db: AsyncSession = Depends(get_async_session),
-    page: int = Query(1, ge=1),           # 默认从第一页开始
-    size: int = Query(10, ge=1, le=100),  # 默认每页显示10条，限制最大值，防滥用
+    pagination: Pagination = Depends(get_pagination),
     document_service: DocumentService = Depends(get_document_service),
 ):
     """列出所有软删除的文档"""
@@ -134,13 +117,14 @@ async def list_documents_with_soft_deleted(
     
     items, total = await document_service.list_documents_with_soft_deleted(
         db=db,
-        page=page,
-        size=size,
+        pagination=pagination,
     )
     
-    logger.info(f"List documents with soft deleted processed: {total} items found")
+    logger.info("List documents with soft deleted processed: %s items found", total)
     
-    return create_pagination_response(items, total, page, size)
+    return model_json_response(
+        create_pagination_response(items, total, pagination.page, pagination.size)
+    )
 
 # response_model=DocumentObjectPaginationResponse[DocumentObjectResponse]
 @router.get("/objects")
@@ -149,7 +133,7 @@ async def list_objects_from_s3(
     document_service: DocumentService = Depends(get_document_service),
 ):
     """列出 S3 存储中的对象列表"""
-    logger.info(f"Listing objects from S3 with prefix: {prefix}")
+    logger.info("Listing objects from S3 with prefix: %s", prefix)
     
     # items, total = await document_service.list_objects_from_s3(prefix)
         
@@ -223,8 +207,8 @@ async def permanently_delete_from_s3(
     永久删除文档
     - storage_key: MinIO 存储路径，例如 uploads/2025/10/29/xxx.txt
     """
-    request_id = request_id_ctx_var.get()
-    logger.info(f"[{request_id}] Attempting to permanently delete document: {storage_key}")
+    # request_id 由日志记录工厂统一注入，无需写入消息文本
+    logger.info("Attempting to permanently delete document: %s", storage_key)
     
     return await document_service.permanently_delete_from_s3(current_user, storage_key)
 
@@ -232,7 +216,7 @@ async def permanently_delete_from_s3(
 @router.get("/{doc_id}/download") 
 async def download_document(
     doc_id: UUID,
-    background_tasks: BackgroundTasks,
+    request: Request,
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
     document_service: DocumentService = Depends(get_document_service), 
@@ -245,7 +229,7 @@ async def download_document(
         db=db,
         user_id=current_user.id,
         doc_id=doc_id,
-        background_tasks=background_tasks
+        range_header=request.headers.get("range"),
     )
     
 @router.get("/{doc_id}/download-url")
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, Header, Query
 from fastapi import HTTPException
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
@@ -15,11 +16,15 @@ from src.schemas.chat import QuestionRequest, QuestionResponse
 from src.schemas.session import SessionResponse
 from src.schemas.session import ChatMessageSchema, ChatMessagePaginatedResponse
 from src.crud.chat import ChatCRUD
+from src.core.responses import model_json_response
 from src.core.depends import get_chat_dao
 
 
 logger = logging.getLogger(__name__)
 
+# 服务层已返回构造好的响应模型，直接序列化，不再经 response_model 二次校验
+SESSION_RESPONSE_LIST = TypeAdapter(List[SessionResponse])
+
 router = APIRouter(prefix="", tags=["sessions"])
 
 @router.post("/sessions/attach")
@@ -66,13 +71,14 @@ async def list_sessions(
         client_id=client_id
     )
 
-    return sessions
+    return model_json_response(sessions, SESSION_RESPONSE_LIST)
 
 @router.get("/sessions/{session_id}/messages", response_model=ChatMessagePaginatedResponse[ChatMessageSchema])
 async def get_session_history(
     session_id: UUID,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，传入时忽略 page"),
     db: AsyncSession = Depends(get_async_session),
     current_user: Optional[User] = Depends(get_optional_user),
     session_service: SessionService = Depends(get_session_service),
@@ -90,13 +96,14 @@ async def get_session_history(
         user=current_user,
         client_id=client_id,
         page=page,
-        size=size
+        size=size,
+        cursor=cursor,
     )
     
     if not session_history:
         logger.info(f"No session history found for session {session_id}")
     
-    return session_history
+    return model_json_response(session_history)
     
 @router.delete("/sessions/{session_id}", status_code=204)
 async def delete_session(
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends
 from celery.result import AsyncResult
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import  datetime, timezone
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import asyncio
+import time
 import logging
 
 from src.schemas.task import (
@@ -16,30 +20,53 @@ from src.schemas.task import (
 )
 from src.workers.celery_app import celery_app
 from src.core.depends import get_async_session
+from src.core.responses import model_json_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+# 任务结果进程内缓存：前端轮询同一任务时，短时间内的重复请求不再访问结果后端
+TASK_RESULT_CACHE_TTL = 0.5       # 未结束任务的缓存时间（秒）
+TASK_RESULT_CACHE_SIZE = 4096     # 每类缓存的最大条目数
+TERMINAL_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED"})
+
+_recent_results: Dict[str, Tuple[float, TaskResultResponse]] = {}         # task_id -> (过期时间, 响应)
+_terminal_results: "OrderedDict[str, TaskResultResponse]" = OrderedDict()  # 已结束任务的结果不再变化，按 LRU 保留
+
+# 任务名 -> 结果模型的校验方法（导入时绑定，直接进入 pydantic-core 校验，无需拆包关键字参数）
 TASK_SCHEMA_MAP = {
-    "upload_document_task": UploadTaskResult,
-    "soft_delete_document_task": DeleteTaskResult,
-    "restore_document_task": RestoreTaskResult,
-    "permanent_delete_document_task": PermanentDeleteTaskResult,
-    "download_document_task": DownloadTaskResult,
-    "list_objects_from_s3_task": ListObjectsResult,
-    "schedule_permanent_deletion_task": ScheduleDeletionResult,
+    name: schema.model_validate
+    for name, schema in {
+        "upload_document_task": UploadTaskResult,
+        "soft_delete_document_task": DeleteTaskResult,
+        "restore_document_task": RestoreTaskResult,
+        "permanent_delete_document_task": PermanentDeleteTaskResult,
+        "download_document_task": DownloadTaskResult,
+        "list_objects_from_s3_task": ListObjectsResult,
+        "schedule_permanent_deletion_task": ScheduleDeletionResult,
+    }.items()
+}
+
+# 任务状态 -> (默认进度, 默认错误信息)；PROGRESS/SUCCESS/FAILURE 在解析时补充任务数据，未知状态按 (0, None) 处理
+TASK_STATE_TABLE = {
+    "PENDING": (0, None),
+    "STARTED": (10, None),
+    "PROGRESS": (50, None),
+    "SUCCESS": (100, None),
+    "FAILURE": (0, None),
+    "RETRY": (0, "Task is being retried"),
+    "REVOKED": (0, "Task has been revoked"),
 }
 
 def _validate_task_result(task_name: str, result_data: dict) -> dict:
     """
     验证任务返回结果是否符合预期的 Pydantic 模型
     """
-    schema_class = TASK_SCHEMA_MAP.get(task_name)
-    if schema_class:
+    validate = TASK_SCHEMA_MAP.get(task_name)
+    if validate:
         try:
-            validated_schema = schema_class(**result_data)
-            return validated_schema.model_dump()
+            return validate(result_data).model_dump()
         except Exception as e:
             logger.warning(f"Task result validation failed for {task_name}: {str(e)}", extra={"result_data": result_data})
             # 如果验证失败，返回原始数据
@@ -48,114 +75,76 @@ def _validate_task_result(task_name: str, result_data: dict) -> dict:
     # 未知任务类型，返回原始数据
     return result_data
 
-def _parse_task_result(result: AsyncResult) -> dict:
-    """根据任务类型解析结果"""
-    updated_at = result.date_done or  datetime.now(timezone.utc)
-    
-    # PENDING - 任务等待中
-    if result.state == "PENDING":
-        return {
-            "task_id": result.id,
-            "state": "PENDING",
-            "progress": 0,
-            "result": None,
-            "error": None,
-            "created_at": None,
-            "updated_at": None
-        }
-    
-    # STARTED - 任务已开始
-    elif result.state == "STARTED":
-        return {
-            "task_id": result.id,
-            "state": "STARTED",
-            "progress": 10,
-            "result": None,
-            "error": None,
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # PROGRESS - 任务进行中
-    elif result.state == "PROGRESS":
-        meta = result.info if isinstance(result.info, dict) else {}
-        return {
-            "task_id": result.id,
-            "state": "PROGRESS",
-            "progress": meta.get("progress", 50),
-            "result": None,
-            "error": None,
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # SUCCESS - 任务成功
-    elif result.state == "SUCCESS":
-        # 直接返回任务的结果
-        task_result = result.result if result.result else None
-        if task_result and isinstance(task_result, dict):
-            task_name = task_result.get("task_name")
+def _parse_task_result(task_id: str, meta: dict) -> TaskResultResponse:
+    """
+    根据任务类型解析结果（meta 为结果后端返回的任务元数据，只读取一次）
+    - 各字段在此处已规范为模型声明的类型，使用 model_construct 直接构造响应，跳过校验
+    """
+    state = meta.get("status", "PENDING")
+    info = meta.get("result")
+    progress, error = TASK_STATE_TABLE.get(state, (0, None))
+    result = None
+    
+    if state == "PROGRESS":
+        if isinstance(info, dict):
+            progress = min(max(int(info.get("progress", progress)), 0), 100)
+    elif state == "SUCCESS":
+        # 直接返回任务的结果，已知任务类型按对应模型校验
+        if info and isinstance(info, dict):
+            task_name = info.get("task_name")
             if task_name:
-                task_result = _validate_task_result(task_name, task_result)
-        return {
-            "task_id": result.id,
-            "state": "SUCCESS",
-            "progress": 100,
-            "result": task_result,  # 保持原始结构
-            "error": None,
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # FAILURE - 任务失败
-    elif result.state == "FAILURE":
-        error_info = str(result.info) if result.info else "Unknown error"
-        return {
-            "task_id": result.id,
-            "state": "FAILURE",
-            "progress": 0,
-            "result": None,
-            "error": error_info,
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # RETRY - 任务重试中
-    elif result.state == "RETRY":
-        return {
-            "task_id": result.id,
-            "state": "RETRY",
-            "progress": 0,
-            "result": None,
-            "error": "Task is being retried",
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # REVOKED - 任务已撤销
-    elif result.state == "REVOKED":
-        return {
-            "task_id": result.id,
-            "state": "REVOKED",
-            "progress": 0,
-            "result": None,
-            "error": "Task has been revoked",
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
-    # 其他未知状态
-    else:
-        return {
-            "task_id": result.id,
-            "state": result.state,
-            "progress": 0,
-            "result": None,
-            "error": None,
-            "created_at": None,
-            "updated_at": updated_at
-        }
-    
+                info = _validate_task_result(task_name, info)
+        result = info or None
+    elif state == "FAILURE":
+        error = str(info) if info else "Unknown error"
+    
+    # PENDING 状态下结果后端没有记录，不返回更新时间
+    updated_at = None
+    if state != "PENDING":
+        updated_at = meta.get("date_done") or datetime.now(timezone.utc)
+        if isinstance(updated_at, str):
+            updated_at = datetime.fromisoformat(updated_at)
+    
+    return TaskResultResponse.model_construct(
+        task_id=task_id,
+        state=state,
+        progress=progress,
+        result=result,
+        error=error,
+        created_at=None,
+        updated_at=updated_at,
+    )
+
+
+def _get_cached_result(task_id: str) -> Optional[TaskResultResponse]:
+    data = _terminal_results.get(task_id)
+    if data is not None:
+        _terminal_results.move_to_end(task_id)
+        return data
+    entry = _recent_results.get(task_id)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _cache_result(task_id: str, data: TaskResultResponse) -> None:
+    if data.state in TERMINAL_STATES:
+        _recent_results.pop(task_id, None)
+        _terminal_results[task_id] = data
+        _terminal_results.move_to_end(task_id)
+        if len(_terminal_results) > TASK_RESULT_CACHE_SIZE:
+            _terminal_results.popitem(last=False)
+        return
+
+    now = time.monotonic()
+    if len(_recent_results) >= TASK_RESULT_CACHE_SIZE:
+        # 先清理过期条目，仍然超限时淘汰最早写入的条目
+        for key in [k for k, (expires, _) in _recent_results.items() if expires <= now]:
+            del _recent_results[key]
+        while len(_recent_results) >= TASK_RESULT_CACHE_SIZE:
+            del _recent_results[next(iter(_recent_results))]
+    _recent_results[task_id] = (now + TASK_RESULT_CACHE_TTL, data)
+
 
 @router.get("/{task_id}", response_model=TaskResultResponse)
 async def get_task_result(task_id: str) -> TaskResultResponse:
@@ -172,15 +161,16 @@ async def get_task_result(task_id: str) -> TaskResultResponse:
     - schedule_permanent_deletion_task: 调度删除任务
     - ... 其他任务类型可扩展
     """
-    try:
-        result = AsyncResult(task_id, app=celery_app)
-        response_data = _parse_task_result(result)
-        
-        return TaskResultResponse(**response_data)
+    # 未预期的异常由全局异常处理器统一记录并返回 500
+    response = _get_cached_result(task_id)
+    if response is None:
+        # 一次读取任务元数据（AsyncResult 的各属性会分别访问结果后端）；同步 Redis 调用放到线程中
+        meta = await asyncio.to_thread(celery_app.backend.get_task_meta, task_id)
+        response = _parse_task_result(task_id, meta)
+        _cache_result(task_id, response)
     
-    except Exception as e:
-        logger.exception(f"Error retrieving task result for {task_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve task result")
+    # 响应由本模块构造，直接序列化，不再经 response_model 二次校验
+    return model_json_response(response)
     
 @router.get("/{chain_id}/progress")
 async def get_task_progress(chain_id: str):
@@ -223,29 +213,24 @@ async def revoke_task(task_id: str) -> dict:
     """
     撤销正在执行的任务
     """
-    try:
-        # 检查任务状态
-        task_result = AsyncResult(task_id, app=celery_app)
-        
-        # 如果任务已经是完成状态，则没有必要撤销
-        if task_result.state in ['SUCCESS', 'FAILURE', 'REVOKED']:
-            return {
-                "status": "warning",
-                "message": f"Task chain is already completed with status: {task_result.state}"
-            }
-        
-        # 执行撤销
-        # terminate=True: 强制终止正在运行的任务
-        # signal='SIGKILL': (可选) 如果 SIGTERM 杀不掉，可以使用 SIGKILL
-        celery_app.control.revoke(task_id, terminate=True, signal='SIGKILL')
-        
-        logger.info(f"Task {task_id} revocation command sent")
-        
+    # 检查任务状态
+    task_result = AsyncResult(task_id, app=celery_app)
+    
+    # 如果任务已经是完成状态，则没有必要撤销
+    if task_result.state in ['SUCCESS', 'FAILURE', 'REVOKED']:
         return {
-            "status": "success",
-            "message": f"Task {task_id} revocation command sent"
+            "status": "warning",
+            "message": f"Task chain is already completed with status: {task_result.state}"
         }
-        
-    except Exception as e:
-        logger.exception(f"Error revoking task {task_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to revoke task: {str(e)}")
\ No newline at end of file
+    
+    # 执行撤销
+    # terminate=True: 强制终止正在运行的任务
+    # signal='SIGKILL': (可选) 如果 SIGTERM 杀不掉，可以使用 SIGKILL
+    celery_app.control.revoke(task_id, terminate=True, signal='SIGKILL')
+    
+    logger.info(f"Task {task_id} revocation command sent")
+    
+    return {
+        "status": "success",
+        "message": f"Task {task_id} revocation command sent"
+    }
\ No newline at end of file
@@ -1,45 +1,29 @@
 import os
+import queue
+import atexit
+import threading
+import weakref
+import time
 import logging
+import logging.handlers
 import importlib
 import json
+import functools
 from pathlib import Path
-from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from src.config.settings import settings
-from src.middleware.request_id import request_id_ctx_var
+from src.middleware.request_id import request_id_ctx_var, task_id_ctx_var
+
+try:
+    import orjson  # 可选依赖：安装后 JSON 日志使用 C 实现序列化
+except ImportError:
+    orjson = None
 
 SERVICE_NAME = settings.PROJECT_NAME
 ENVIRONMENT = settings.ENVIRONMENT
 
 
-class ContextFilter(logging.Filter):
-    """
-    自定义的日志过滤器，用于在日志中添加 request_id 和 task_id
-    - 自动从 ContextVar 获取 request_id 和 task_id 并注入到 LogRecord。
-    - 确保 request_id 和 task_id 字段始终存在，防止 TextFormatter 报错。
-    """
-    def filter(self, record: logging.LogRecord) -> bool:
-        # 获取 request_id 和 task_id
-        # 优先使用 extra 传入的，其次使用 ContextVar，最后默认为空
-        if not getattr(record, "request_id", None):
-            ctx_id = request_id_ctx_var.get()
-            record.request_id = ctx_id if ctx_id else ""
-            
-        # 获取 task_id（Celery 场景）
-        if not getattr(record, "task_id", None):
-            try:
-                from celery import current_task
-                if current_task:
-                    tid = getattr(current_task.request, "id", None)
-                    record.task_id = tid if tid else ""
-                else:
-                    record.task_id = ""
-            except Exception:
-                record.task_id = ""
-                
-        return True
-    
-# 定义 LogRecordFactory (替代 ContextFilter)
+# 定义 LogRecordFactory
 def setup_log_record_factory():
     """
     安装自定义 LogRecordFactory。
@@ -48,39 +32,59 @@ def setup_log_record_factory():
     """
     # 获取原有的 factory，保留原有逻辑
     old_factory = logging.getLogRecordFactory()
+    
+    # 绑定方法提前取出，每条记录省去模块属性和方法查找
+    get_request_id = request_id_ctx_var.get
+    get_task_id = task_id_ctx_var.get
 
     def record_factory(*args, **kwargs):
         # 创建标准的 LogRecord
         record = old_factory(*args, **kwargs)
 
-        # --- 注入 request_id ---
-        # 检查是否已有 request_id（通过 extra 传入）
-        if not hasattr(record, "request_id"):
-            # 尝试从 ContextVar 获取，默认为空字符串
-            req_id = request_id_ctx_var.get()
-            record.request_id = req_id if req_id else ""
-
-        # --- 注入 task_id (Celery) ---
-        # 检查是否已存在 task_id（通过 extra 传入）
-        if not hasattr(record, "task_id"): 
-            # 默认为空
-            record.task_id = ""
-            try:
-                # 懒加载 celery，防止循环导入或未安装报错
-                from celery import current_task
-                if current_task:
-                    # 获取 Celery Task ID
-                    tid = getattr(current_task.request, "id", None)
-                    record.task_id = tid if tid else ""
-                    
-            except (ImportError, AttributeError, Exception):
-                pass
-            
+        # 直接读取 ContextVar：request_id 由中间件 / task_prerun 设置，task_id 由 task_prerun 设置
+        # 调用方无需（也不能）再通过 extra 传入这两个字段，否则 makeRecord 会报字段覆盖错误
+        d = record.__dict__
+        d["request_id"] = get_request_id() or ""
+        d["task_id"] = get_task_id() or ""
         return record
     
     # 设置为全局 factory
     logging.setLogRecordFactory(record_factory)
 
+# JSON 日志中不作为 extra 字段输出的 LogRecord 内建属性（含已单独处理的字段）
+_SKIP_FIELDS = frozenset({
+    "msg", "args", "levelname", "levelno", "name", "pathname", "filename",
+    "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName",
+    "created", "msecs", "relativeCreated", "thread", "threadName",
+    "processName", "process", "taskName", "message", "asctime",
+    "request_id", "task_id",
+})
+
+
+# orjson 选项：extra 中的非字符串键直接序列化，datetime 统一按 UTC 输出（Z 后缀）
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z if orjson is not None else 0
+)
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    """序列化日志载荷；无法直接序列化的 extra 值转为字符串（orjson 原生支持 UUID、datetime 等）"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+@functools.lru_cache(maxsize=256)
+def _iso_second(sec: int) -> str:
+    """整秒部分的 UTC ISO 时间前缀；同一秒内的日志共享，避免每条记录构造 datetime"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+
+
+def _iso_timestamp(created: float) -> str:
+    sec = int(created)
+    return f"{_iso_second(sec)}.{int((created - sec) * 1_000_000):06d}+00:00"
+
+
 class SimpleJsonFormatter(logging.Formatter):
     """
     自定义的 JSON 格式化器，用于结构化日志输出
@@ -88,14 +92,15 @@ class SimpleJsonFormatter(logging.Formatter):
     """
     def format(self, record: logging.LogRecord) -> str:
         payload: Dict[str, Any] = {
-            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "timestamp": _iso_timestamp(record.created),
             "levelname": record.levelname,
             "module": record.module,
             "funcName": record.funcName,
             "lineno": record.lineno,
             "message": record.getMessage(),
-            "request_id": record.request_id,
-            "task_id": record.task_id,
+            # 正常由 LogRecordFactory 注入；未经工厂创建的记录（如 makeLogRecord）回退到 ContextVar
+            "request_id": getattr(record, "request_id", None) or request_id_ctx_var.get() or "",
+            "task_id": getattr(record, "task_id", None) or task_id_ctx_var.get() or "",
         }
         
         # 异常堆栈处理
@@ -104,37 +109,54 @@ class SimpleJsonFormatter(logging.Formatter):
 
         # 合并额外字段（extra），排除内建字段
         # 这使得 logger.info("msg", extra={"user_id": 1}) 中的 user_id 变成 JSON 顶层字段
-        skip_keys = {
-            "msg", "args", "levelname", "levelno", "name", "pathname", "filename",
-            "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName",
-            "created", "msecs", "relativeCreated", "thread", "threadName",
-            "processName", "process", "request_id", "task_id" # 排除已处理的字段
-        }
-        
-        for k, v in record.__dict__.items():
-            if k not in skip_keys and not k.startswith("_"):
-                payload[k] = v
+        # 先用键集合差集（C 层完成）判断是否存在 extra，多数日志没有 extra，可跳过逐字段遍历
+        attrs = record.__dict__
+        extra_keys = attrs.keys() - _SKIP_FIELDS
+        if extra_keys:
+            payload.update({
+                k: v for k, v in attrs.items()
+                if k in extra_keys and not k.startswith("_")
+            })
+
+        return _dumps(payload)
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    文本格式化器：按整秒缓存 asctime 字符串
+    - 同一秒内的日志共享一次 strftime，毫秒部分仍由格式串中的 %(msecs)03d 输出
+    - 格式串是否包含 asctime 在构造时判断一次，不再每条记录查找
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._uses_time = super().usesTime()
+        self._time_cache: Tuple[int, str] = (-1, "")   # (整秒, 格式化结果)，整体替换保证线程间一致
+
+    def usesTime(self) -> bool:
+        return self._uses_time
 
-        return json.dumps(payload, ensure_ascii=False)
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        cached = self._time_cache
+        if cached[0] != sec:
+            cached = self._time_cache = (sec, time.strftime(datefmt, self.converter(sec)))
+        return cached[1]
 
 
 # 日志文件路径（可通过环境变量覆盖，默认使用相对可写路径以便跨平台）
 FILE_LOG_PATH = os.getenv("APP_LOG_FILE", os.getenv("FILE_LOG_PATH", str(Path.cwd() / "logs" / "app.log")))
-# 检查日志文件路径是否可写
-_enable_file_handler = False
-try:
-    file_parent = Path(FILE_LOG_PATH).parent
-    file_parent.mkdir(parents=True, exist_ok=True)
-    test_path = file_parent / (".write_test")
+# 文件日志开关（默认开启）；关闭时跳过目录创建与可写检查，减少工作进程启动时的文件系统调用
+_enable_file_handler = os.getenv("APP_LOG_FILE_ENABLED", "1") == "1"
+if _enable_file_handler:
     try:
-        with open(test_path, "w", encoding="utf-8") as f:
-            f.write("ok")
-        test_path.unlink(missing_ok=True)
-        _enable_file_handler = True
-    except Exception:
+        file_parent = Path(FILE_LOG_PATH).parent
+        file_parent.mkdir(parents=True, exist_ok=True)
+        # 用 access 判断目录可写，不再创建 / 删除探测文件
+        _enable_file_handler = os.access(file_parent, os.W_OK)
+    except OSError:
         _enable_file_handler = False
-except Exception:
-    _enable_file_handler = False
 
 # 格式化器选择
 formatter_name = "json" if ENVIRONMENT == "production" else "default"
@@ -144,12 +166,6 @@ logging_config = {
     "version": 1,
     "disable_existing_loggers": False,
     
-    # "filters": {
-    #     "context_filter": {
-    #         "()": ContextFilter,  # 挂载自定义过滤器
-    #     }
-    # },
-    
     "formatters": {
         "json": {
             # "()": "pythonjsonlogger.jsonlogger.JsonFormatter",
@@ -157,7 +173,7 @@ logging_config = {
             "()": "src.config.logging.SimpleJsonFormatter",
         },
         "default": {
-           "()": "logging.Formatter",
+            "()": "src.config.logging.CachedTimeFormatter",
             "format": "[%(asctime)s.%(msecs)03d] [%(levelname)s] [ReqID:%(request_id)s] [%(module)s] [%(funcName)s:%(lineno)d]: %(message)s",
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
@@ -166,7 +182,6 @@ logging_config = {
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
-            # "filters": ["context_filter"],  # 挂载过滤器
             "formatter": formatter_name,
             "stream": "ext://sys.stdout",
         },
@@ -210,11 +225,241 @@ logging_config = {
 if _enable_file_handler:
     # 可选：仅当在非容器环境需要文件时启用
     logging_config["handlers"]["file"] = {
-        "class": "logging.handlers.RotatingFileHandler",
-        # "filters": ["context_filter"],  # 挂载过滤器
+        "class": "src.config.logging.BatchingRotatingFileHandler",
         "formatter": "json",  # 文件日志使用 JSON 格式
         "filename": FILE_LOG_PATH,
         "maxBytes": 10 * 1024 * 1024,
         "backupCount": 5,
         "encoding": "utf-8",
-    }
\ No newline at end of file
+    }
+
+
+class _PassthroughQueueHandler(logging.handlers.QueueHandler):
+    """
+    仅在调用线程中求值消息文本（args 可能引用可变对象），其余字段原样交给后台线程的处理器格式化
+    - 默认的 prepare 会把异常堆栈合并进 message，这里保留 exc_info，JSON 日志仍输出独立的 exception 字段
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+LOG_BATCH_SIZE = 256          # 后台线程每次从队列取出并批量输出的最大日志条数
+LOG_BUFFER_SIZE = 64 * 1024   # 日志文件写缓冲大小（字节）
+LOG_FLUSH_INTERVAL = 1.0      # 定时刷盘间隔（秒）
+LOG_FLUSH_LEVEL = logging.WARNING  # 不低于该级别的日志立即刷盘
+
+
+# 带写缓冲的文件处理器；fork 前统一刷盘，避免子进程继承缓冲后与父进程重复写出同一批日志
+_buffered_file_handlers: "weakref.WeakSet[BatchingRotatingFileHandler]" = weakref.WeakSet()
+
+
+def _flush_before_fork() -> None:
+    for handler in list(_buffered_file_handlers):
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_before_fork)
+
+
+class BatchingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    带写缓冲、支持批量写入的滚动文件处理器
+    - 文件以 64 KiB 缓冲打开，普通日志由后台线程每秒刷盘一次，WARNING 及以上立即刷盘
+    - 由后台监听线程调用 handle_batch：整批日志格式化后合并为一次 write
+    - 进程退出时 logging.shutdown 会关闭处理器并刷出缓冲中的内容；fork 前先刷盘，子进程不会重复写出父进程的缓冲
+    """
+    def __init__(self, *args, **kwargs):
+        self._flusher_pid = None
+        self._flush_stop = threading.Event()
+        super().__init__(*args, **kwargs)
+        _buffered_file_handlers.add(self)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def _stream_size(self) -> int:
+        # TextIOWrapper.tell() 会先刷出缓冲，改为读取底层 BufferedWriter 的位置
+        # 不含文本层尚未编码的部分（至多约 8 KiB），对按 MB 滚动的文件可忽略
+        return self.stream.buffer.tell()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0:
+            size = self._stream_size()
+            if size and size + len(self.format(record) + self.terminator) >= self.maxBytes:
+                return True
+        return False
+
+    def _ensure_flusher(self) -> None:
+        # 按进程启动刷盘线程：fork 出的 Celery 子进程不会继承父进程的线程
+        pid = os.getpid()
+        if self._flusher_pid != pid:
+            self._flusher_pid = pid
+            threading.Thread(target=self._flush_loop, name="log-flusher", daemon=True).start()
+
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(LOG_FLUSH_INTERVAL):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._ensure_flusher()
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= LOG_FLUSH_LEVEL:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        chunks: List[str] = []
+        size = None
+        urgent = False
+        with self.lock:
+            try:
+                self._ensure_flusher()
+                if self.stream is None:
+                    self.stream = self._open()
+                for record in records:
+                    if record.levelno < self.level or not self.filter(record):
+                        continue
+                    try:
+                        msg = self.format(record) + self.terminator
+                    except Exception:
+                        self.handleError(record)
+                        continue
+                    if self.maxBytes > 0:
+                        if size is None:
+                            size = self._stream_size()
+                        # 与 shouldRollover 判断一致：写入后将超过上限时先滚动
+                        if size and size + len(msg) >= self.maxBytes:
+                            if chunks:
+                                self.stream.write("".join(chunks))
+                                chunks.clear()
+                            self.doRollover()
+                            size = 0
+                        size += len(msg)
+                    chunks.append(msg)
+                    urgent = urgent or record.levelno >= LOG_FLUSH_LEVEL
+                if chunks:
+                    self.stream.write("".join(chunks))
+                    if urgent:
+                        self.flush()
+            except Exception:
+                self.handleError(records[-1])
+
+    def close(self) -> None:
+        self._flush_stop.set()
+        super().close()
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    队列中积压多条日志时一次取出一批，交给处理器批量输出
+    - 支持 handle_batch 的处理器（如 BatchingRotatingFileHandler）整批写入
+    - 其他处理器（如控制台）逐条处理
+    """
+    def _monitor(self) -> None:
+        q = self.queue
+        has_task_done = hasattr(q, "task_done")
+        stop = False
+        while not stop:
+            batch: List[logging.LogRecord] = []
+            record = self.dequeue(True)
+            dequeued = 1
+            while True:
+                if record is self._sentinel:
+                    stop = True
+                    break
+                batch.append(record)
+                if len(batch) >= LOG_BATCH_SIZE:
+                    break
+                try:
+                    record = self.dequeue(False)
+                except queue.Empty:
+                    break
+                dequeued += 1
+            if batch:
+                self.handle_batch(batch)
+            if has_task_done:
+                for _ in range(dequeued):
+                    q.task_done()
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            handle_batch = getattr(handler, "handle_batch", None)
+            if handle_batch is not None:
+                handle_batch(records)
+                continue
+            for record in records:
+                if not self.respect_handler_level or record.levelno >= handler.level:
+                    handler.handle(record)
+
+
+# 使用独立处理器（propagate=False）的日志器，与根日志器一起改为队列输出
+_QUEUED_LOGGERS = ("", "uvicorn.access", "uvicorn.error")
+
+# [(日志器, 原处理器列表, 队列处理器)]，停止时据此恢复
+_queued_loggers: List[Tuple[logging.Logger, List[logging.Handler], logging.Handler]] = []
+_log_listeners: List[logging.handlers.QueueListener] = []
+
+
+def start_log_listener() -> None:
+    """
+    将根日志器及 uvicorn 日志器上的处理器（控制台、文件）替换为队列处理器，由后台线程输出
+    - 在事件循环中记录日志只需一次入队操作，不再同步写控制台 / 磁盘
+    - 处理器组合相同的日志器共用一个队列和监听线程
+    - 需在进程启动后（而非 fork 之前）调用，监听线程不会随 fork 复制
+    """
+    if _log_listeners:
+        return
+    queue_handlers: Dict[Tuple[logging.Handler, ...], logging.Handler] = {}
+    for name in _QUEUED_LOGGERS:
+        target = logging.getLogger(name)
+        handlers = list(target.handlers)
+        if not handlers:
+            continue
+        key = tuple(handlers)
+        queue_handler = queue_handlers.get(key)
+        if queue_handler is None:
+            log_queue = queue.SimpleQueue()
+            queue_handler = _PassthroughQueueHandler(log_queue)
+            listener = _BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _log_listeners.append(listener)
+            queue_handlers[key] = queue_handler
+        for handler in handlers:
+            target.removeHandler(handler)
+        target.addHandler(queue_handler)
+        _queued_loggers.append((target, handlers, queue_handler))
+    # 进程直接退出（未经过 lifespan 关闭）时也写完队列中剩余的日志
+    atexit.register(stop_log_listener)
+
+
+def stop_log_listener() -> None:
+    """停止后台输出线程（会先输出完队列中剩余的日志），并恢复原处理器"""
+    if not _log_listeners:
+        return
+    for target, handlers, queue_handler in _queued_loggers:
+        target.removeHandler(queue_handler)
+        for handler in handlers:
+            target.addHandler(handler)
+    _queued_loggers.clear()
+    for listener in _log_listeners:
+        listener.stop()
+    _log_listeners.clear()
+    atexit.unregister(stop_log_listener)
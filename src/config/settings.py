@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr, Field
 from typing import List, Optional
-from functools import lru_cache
+from functools import lru_cache, cached_property
 
 
 class Settings(BaseSettings):
@@ -27,6 +27,13 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = ""
+
+    # 异步引擎连接池配置
+    DB_POOL_SIZE: int = 20          # 常驻连接数
+    DB_MAX_OVERFLOW: int = 40       # 高峰期允许额外创建的连接数
+    DB_POOL_TIMEOUT: float = 5      # 获取连接的最长等待时间（秒）
+    DB_POOL_RECYCLE: int = 1800     # 连接回收周期（秒）
+    DB_STATEMENT_CACHE_SIZE: int = 256  # asyncpg 每个连接缓存的预编译语句数量
     
     # MinIO 配置
     MINIO_ENDPOINT: str = "localhost:9000"
@@ -35,9 +42,9 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = False
     MINIO_BUCKET_NAME: str = "documents"
 
-    @property
+    @cached_property
     def SQLALCHEMY_DATABASE_URL(self) -> str:
-        """返回 SQLAlchemy 使用的数据库连接字符串"""
+        """返回 SQLAlchemy 使用的同步数据库连接字符串（首次访问后缓存）"""
         if self.DATABASE_URL:
             return self.DATABASE_URL
         
@@ -45,10 +52,11 @@ class Settings(BaseSettings):
         # return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
         return f"postgresql+psycopg2://{self.POSTGRES_USER}:{pwd}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @cached_property
     def SQLALCHEMY_ASYNC_DATABASE_URL(self) -> str:
-        """返回 SQLAlchemy 使用的数据库连接字符串"""
-        if self.DATABASE_URL:
-            return self.DATABASE_URL
+        """返回 SQLAlchemy 使用的异步数据库连接字符串（首次访问后缓存）"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
         
         pwd = self.POSTGRES_PASSWORD.get_secret_value()
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{pwd}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -58,6 +66,8 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15   # 短期
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7      # 长期
+    # Refresh Token 入库摘要使用的 HMAC 密钥（未配置时回退到 JWT_SECRET_KEY）
+    REFRESH_TOKEN_HMAC_KEY: SecretStr = SecretStr("")
 
     # 邮件服务
     RESEND_API_KEY: SecretStr = SecretStr("")
@@ -76,6 +86,8 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
     CELERY_WORKER_CONCURRENCY: Optional[int] = None
+    DOCUMENT_TASK_QUEUE: str = "celery"  # 文档处理任务所在队列（Broker 中的 Redis list 键）
+    MAX_QUEUE_DEPTH: int = 1000  # 队列积压超过该值时拒绝新的文档任务（返回 503）
     
     # 日志配置
     APP_LOG_LEVEL: str = "INFO"
@@ -86,6 +98,11 @@ class Settings(BaseSettings):
     # Qdrant 配置
     QDRANT_SERVER_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: SecretStr = SecretStr("")
+
+    @cached_property
+    def QDRANT_USE_HTTPS(self) -> bool:
+        """Qdrant 是否使用 HTTPS（根据 URL 协议判断，首次访问后缓存）"""
+        return self.QDRANT_SERVER_URL.startswith("https")
     
     # Embeddings 配置
     EMBEDDING_MODEL_NAME: str = ""
@@ -127,6 +144,7 @@ class Settings(BaseSettings):
         env_file_encoding="utf-8",
         extra="ignore",
         case_sensitive=False,
+        frozen=True,  # 启动后配置只读，防止运行期被意外修改
     )
 
 @lru_cache()
@@ -3,6 +3,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from contextlib import contextmanager, asynccontextmanager
 from typing import Generator, AsyncGenerator
 
@@ -22,19 +23,39 @@ engine = create_engine(
     settings.DATABASE_URL,      # 数据库连接 URL
     pool_pre_ping=True,         # 检测连接是否可用
     pool_recycle=3600,          # 定时回收连接（避免 MySQL 8 小时断开）
+    pool_use_lifo=True,         # 优先复用最近归还的连接，其服务端缓存更“热”，空闲连接可自然超时回收
     echo=False                  # True 时打印 SQL 日志，生产建议 False
 )
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+SessionLocal = sessionmaker(
+    bind=engine,
+    autoflush=False,
+    autocommit=False,
+    expire_on_commit=False  # 与异步会话一致：提交后读取属性不再重新 SELECT，需要最新数据时显式 refresh
+)
 
 if not settings.ASYNC_DATABASE_URL:
     raise ValueError(
         "ASYNC_DATABASE_URL is not set, please check your settings")
 
 # 创建异步引擎
+# 连接池需使用 AsyncAdaptedQueuePool（普通 QueuePool 在 asyncio 下会阻塞）
 async_engine = create_async_engine(
     settings.ASYNC_DATABASE_URL,      # 数据库连接 URL
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,            # 常驻连接数（默认 5 在并发请求下容易排队）
+    max_overflow=settings.DB_MAX_OVERFLOW,      # 高峰期额外连接数
+    pool_timeout=settings.DB_POOL_TIMEOUT,      # 获取连接超时，快速失败而不是长时间挂起
     pool_pre_ping=True,         # 检测连接是否可用
-    pool_recycle=3600,          # 定时回收连接（避免 MySQL 8 小时断开）
+    pool_recycle=settings.DB_POOL_RECYCLE,      # 定时回收连接
+    pool_use_lifo=True,         # 优先复用最近归还的连接，其预编译语句缓存更“热”
+    # 增大 SQLAlchemy 与 asyncpg 的预编译语句缓存（默认 100），减少重复 PREPARE
+    connect_args=(
+        {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+        if "+asyncpg" in settings.ASYNC_DATABASE_URL else {}
+    ),
     echo=False                  # True 时打印 SQL 日志，生产建议 False
 )
 AsyncSessionLocal = async_sessionmaker(
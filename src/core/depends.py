@@ -1,4 +1,7 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+import logging
+from functools import lru_cache
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +14,7 @@ from src.core.database import get_sync_db
 from src.core.database import get_async_db
 from src.models.user import User
 from src.core import security
+from src.core import user_cache
 from src.crud.user import UserCRUD
 from src.crud.document import DocumentCRUD
 from src.crud.chat import ChatCRUD
@@ -18,9 +22,17 @@ from src.services.user_service import UserService
 from src.services.document_service import DocumentService
 from src.services.chat_service import ChatService
 from src.services.session_service import SessionService
-from src.utils.minio_storage import MinioClient
+from src.utils.minio_storage import MinioClient, get_shared_minio_client
 from src.utils.llm_client import LLMClient
 from src.utils.qdrant_storage import QdrantClient
+from src.utils.redis_client import get_broker_redis
+from src.schemas.pagination import Pagination
+from src.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FULL_RETRY_AFTER = 30  # 队列积压时建议客户端重试的间隔（秒）
 
 
 # OAuth2 认证方式：Bearer Token
@@ -38,8 +50,15 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with get_async_db() as db:
         yield db
  
+# CRUD 与 DocumentService 均无请求级状态，进程内共享一个实例，避免每个请求重复构造
+_user_crud = UserCRUD()
+_document_crud = DocumentCRUD()
+_chat_crud = ChatCRUD()
+_document_service: Optional[DocumentService] = None
+
+
 async def get_user_dao():
-    return UserCRUD()
+    return _user_crud
 
 async def get_user_service(
     db: AsyncSession = Depends(get_async_session),
@@ -64,14 +83,17 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     try:
-        payload = security.decode_token(token)
-        
-        if payload.get("type") != "access":
+        # 先不验签读取令牌类型，非访问令牌（如误用的刷新令牌）直接拒绝，省去签名校验
+        unverified = jwt.decode(token, options={"verify_signature": False})
+        if unverified.get("type") != "access":
             raise HTTPException(
                 status_code=401, 
                 detail="Invalid token type",
                 headers={"WWW-Authenticate": "Bearer"}
             )
+        
+        # 候选访问令牌再做完整的签名与过期校验（载荷与上面为同一令牌，类型无需再判断）
+        payload = security.decode_token(token)
             
         user_id = payload.get("sub")
         if user_id is None:
@@ -81,7 +103,8 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"}
             )
            
-        user_id = UUID(user_id) 
+        # 登录签发的 sub 为 UUID 十六进制串；UUID(hex=...) 同时兼容旧令牌中带连字符的格式
+        user_id = UUID(hex=user_id)
             
     except (jwt.PyJWTError, ValueError):
         raise HTTPException(
@@ -90,6 +113,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    # 短时间内同一用户的请求复用缓存的用户数据，不再每次查询数据库
+    user = await user_cache.get_cached_user(db, user_id)
+    if user is not None:
+        return user
+    
     user = await user_crud.get_active_user_by_id(db, user_id)
     
     if user is None:
@@ -99,6 +127,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    user_cache.cache_user(user)
     return user
 
 async def get_optional_user(
@@ -109,34 +138,96 @@ async def get_optional_user(
     """
     尝试获取当前用户，但如果未认证则返回 None
     - 对于已登录用户，返回用户对象
-    - 对于游客（未登录），返回 None
+    - 对于游客（未登录）或令牌无效 / 用户不存在，返回 None
     """
     if not token:
         return None
-        
-    return await get_current_user(token, db, user_crud)
+    
+    # 与 get_current_user 相同的解析流程，失败时直接返回 None，不构造 401 异常
+    try:
+        unverified = jwt.decode(token, options={"verify_signature": False})
+        if unverified.get("type") != "access":
+            return None
+        user_id = security.decode_token(token).get("sub")
+        if user_id is None:
+            return None
+        user_id = UUID(hex=user_id)
+    except (jwt.PyJWTError, ValueError):
+        return None
+    
+    user = await user_cache.get_cached_user(db, user_id)
+    if user is not None:
+        return user
+    
+    user = await user_crud.get_active_user_by_id(db, user_id)
+    if user is not None:
+        user_cache.cache_user(user)
+    return user
+
+async def get_pagination(
+    page: int = Query(1, ge=1),           # 默认从第一页开始
+    size: int = Query(10, ge=1, le=100),  # 默认每页显示10条，限制最大值，防滥用
+) -> Pagination:
+    """分页查询参数：统一校验并预先计算 offset"""
+    return Pagination(page=page, size=size, offset=(page - 1) * size)
+
 
 async def get_document_dao():
-    return DocumentCRUD()
+    return _document_crud
 
 async def get_document_service():
-    return DocumentService()
+    # 首次使用时创建（内含 MinIO 客户端及其连接池）
+    global _document_service
+    if _document_service is None:
+        _document_service = DocumentService()
+    return _document_service
 
 def get_minio_client() -> MinioClient:
     """
     获取配置好的 MinioClient 实例
     """
-    return MinioClient()
+    return get_shared_minio_client()
+
+@lru_cache(maxsize=1)
+def _llm_client() -> LLMClient:
+    # 内含 httpx.AsyncClient 连接池，进程内共享，应用退出时由 close_llm_client 关闭
+    return LLMClient()
+
+@lru_cache(maxsize=1)
+def _vector_store() -> QdrantClient:
+    # 构造时加载 Embeddings 模型并检查集合，只在首次使用时执行一次
+    return QdrantClient()
 
 async def get_llm_client() -> LLMClient:
-    llm_client = LLMClient()
-    return llm_client
+    return _llm_client()
 
 def get_vector_store() -> QdrantClient:
-    return QdrantClient() 
+    return _vector_store()
+
+async def warm_up_clients() -> None:
+    """
+    应用启动时预先创建共享客户端，首个请求不再承担构造开销
+    - 构造含阻塞 I/O（加载 Embeddings 模型、检查集合、连接 MinIO），放到线程中执行
+    - 创建失败只记录警告，首次使用时会再次尝试
+    """
+    for name, factory in (
+        ("LLM client", _llm_client),
+        ("vector store", _vector_store),
+        ("MinIO client", get_shared_minio_client),
+    ):
+        try:
+            await asyncio.to_thread(factory)
+        except Exception as e:
+            logger.warning(f"Failed to warm up {name}, will retry on first use: {e}")
+
+async def close_llm_client() -> None:
+    """关闭共享的 LLM 客户端（未创建过则跳过）"""
+    if _llm_client.cache_info().currsize:
+        await _llm_client().close()
+        _llm_client.cache_clear()
 
 async def get_chat_dao():
-    return ChatCRUD()  
+    return _chat_crud
 
 async def get_chat_service(
     chat_crud: ChatCRUD = Depends(get_chat_dao),
@@ -149,4 +240,29 @@ async def get_chat_service(
 async def get_session_service(
     chat_crud: ChatCRUD = Depends(get_chat_dao),
 ):
-    return SessionService(chat_crud)
\ No newline at end of file
+    return SessionService(chat_crud)
+
+
+async def get_queue_depth() -> int:
+    """读取文档任务队列当前积压的消息数"""
+    return await get_broker_redis().llen(settings.DOCUMENT_TASK_QUEUE)
+
+
+async def check_queue_admission() -> None:
+    """
+    任务入队前的准入控制：队列积压超过上限时直接返回 503，避免无限堆积
+    - Broker 不可用时放行，由后续入队逻辑自行报错
+    """
+    try:
+        depth = await get_queue_depth()
+    except Exception as e:
+        logger.warning(f"Failed to read task queue depth, skipping admission check: {e}")
+        return
+    
+    if depth >= settings.MAX_QUEUE_DEPTH:
+        logger.warning(f"Task queue is full: depth={depth}, limit={settings.MAX_QUEUE_DEPTH}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Task queue is busy, please retry later",
+            headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER)},
+        )
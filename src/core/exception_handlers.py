@@ -1,5 +1,5 @@
 from fastapi import Request, status, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Response
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
 from minio.error import S3Error
@@ -8,21 +8,47 @@ import logging
 
 from src.core.exceptions import BaseAppException
 from src.config.settings import settings
+from src.core.responses import DefaultJSONResponse, prebuilt_json_body
 from src.middleware.request_id import request_id_ctx_var
 
 logger = logging.getLogger(__name__)
 
+# 配置只读（Settings 为 frozen），运行环境在导入时判断一次
+_IS_PROD = settings.ENVIRONMENT == "production"
+
+# 内容固定的错误响应体，导入时序列化一次
+_INTEGRITY_ERROR_BODY = prebuilt_json_body({
+    "error": {
+        "error_code": "resource_conflict",
+        "message": "Resource already exists or violates constraints",
+    }
+})
+_DB_UNAVAILABLE_BODY = prebuilt_json_body({
+    "error": {
+        "error_code": "database_unavailable",
+        "message": "Database service temporarily unavailable",
+    }
+})
+_DB_ERROR_BODY = prebuilt_json_body({
+    "error": {
+        "error_code": "database_error",
+        "message": "Unexpected database error occurred ",
+    }
+})
+# 生产环境不返回 s3_code，响应体固定
+_S3_ERROR_PROD_BODY = prebuilt_json_body({
+    "error": {
+        "error_code": "storage_service_error",
+        "message": "Storage service temporarily unavailable",
+        "detail": None,
+    }
+})
+
 
 def sanitize_error_for_production(error: str, exc_type: str) -> str:
     """生产环境下过滤敏感信息"""
-    if settings.ENVIRONMENT == "production":
-        # 移除文件路径
-        import re
-        error = re.sub(r'[A-Za-z]:\\[^\s]+', '[PATH_REDACTED]', error)
-        error = re.sub(r'/[^\s]+\.py', '[FILE_REDACTED]', error)
-        # 移除敏感关键词
-        for keyword in ['password', 'secret', 'token', 'key']:
-            error = re.sub(rf'{keyword}[=:]\s*\S+', f'{keyword}=[REDACTED]', error, flags=re.IGNORECASE)
+    if _IS_PROD:
+        # 生产环境只返回异常类型，原始错误信息（路径、密钥等）不出现在响应中，无需逐项脱敏
         return f"Internal error occurred ({exc_type})"
     return error
 
@@ -32,27 +58,27 @@ async def base_app_exception_handler(request: Request, exc: BaseAppException):
     request_id = request_id_ctx_var.get()
     
     # LogRecord extra 中无需手动传递 request_id
-    # ContextFilter 会自动从 ContextVar 获取并注入到 LogRecord
+    # LogRecordFactory 会自动从 ContextVar 获取并注入到 LogRecord
     logger.error(
         f"Business exception: {exc.error_code} - {exc.message}",
         extra={
             # "request_id": request_id,      # 请求ID
             "error_code": exc.error_code,  # 业务错误码
-            "path": str(request.url),      # 请求路径
+            "path": request.url.path,      # 请求路径
             "method": request.method,      # HTTP方法
             "details": exc.details,        # 异常详情
         },
         exc_info=exc.status_code >= 500
     )
     
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
                 # "request_id": request_id,
                 "error_code": exc.error_code,
                 "message": exc.message,
-                "details": exc.details if settings.ENVIRONMENT != "production" else {},
+                "details": exc.details if not _IS_PROD else {},
             }
         }
     )
@@ -65,7 +91,7 @@ async def http_exception_passthrough_handler(request: Request, exc: HTTPExceptio
         f"HTTP exception: {exc.status_code} - {exc.detail}",
         extra={
             # "request_id": request_id,
-            "path": str(request.url),
+            "path": request.url.path,
             "method": request.method,
         }
     )
@@ -90,7 +116,7 @@ async def http_exception_passthrough_handler(request: Request, exc: HTTPExceptio
             "detail": detail,
         }
     }
-    return JSONResponse(status_code=exc.status_code, content=content)
+    return DefaultJSONResponse(status_code=exc.status_code, content=content)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -102,12 +128,12 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         f"Request validation failed: {len(errors)} error(s)",
         extra={
             # "request_id": request_id,
-            "path": str(request.url),
+            "path": request.url.path,
             "method": request.method,
         }
     )
     
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": {
@@ -119,53 +145,37 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         }
     )
 
+async def integrity_error_handler(request: Request, exc: IntegrityError):
+    """处理数据库约束冲突（409）"""
+    logger.warning(
+        f"Database integrity error: {str(exc)}", exc_info=True,
+        extra={
+            # "request_id": request_id,
+            "path": request.url.path,
+        }
+    )
+    return Response(
+        content=_INTEGRITY_ERROR_BODY,
+        status_code=status.HTTP_409_CONFLICT,
+        media_type="application/json",
+    )
+
+async def operational_error_handler(request: Request, exc: OperationalError):
+    """处理数据库连接 / 运行错误（503）"""
+    logger.error(f"Database operational error: {exc}", exc_info=True)
+    return Response(
+        content=_DB_UNAVAILABLE_BODY,
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        media_type="application/json",
+    )
+
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
-    """处理数据库异常"""
-    request_id = request_id_ctx_var.get()
-    
-    # 区分不同类型的数据库错误
-    if isinstance(exc, IntegrityError):
-        logger.warning(
-            f"Database integrity error: {str(exc)}", exc_info=True,
-            extra={
-                # "request_id": request_id,
-                "path": str(request.url),
-            }
-        )
-        return JSONResponse(
-            status_code=status.HTTP_409_CONFLICT,
-            content={
-                "error": {
-                    # "request_id": request_id,
-                    "error_code": "resource_conflict",
-                    "message": "Resource already exists or violates constraints",
-                }
-                    
-            }
-        )
-    elif isinstance(exc, OperationalError):
-        logger.error(f"Database operational error: {exc}", exc_info=True, extra={"request_id": request_id})
-        return JSONResponse(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            content={
-                "error": {
-                    # "request_id": request_id,
-                    "error_code": "database_unavailable",
-                    "message": "Database service temporarily unavailable",
-                }
-            }
-        )
-    # 其他数据库错误
-    logger.error(f"Unexpected database error: {type(exc).__name__}", exc_info=True, extra={"request_id": request_id})
-    return JSONResponse(
+    """处理其他数据库异常（IntegrityError / OperationalError 已单独注册处理器）"""
+    logger.error(f"Unexpected database error: {type(exc).__name__}", exc_info=True)
+    return Response(
+        content=_DB_ERROR_BODY,
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "error": {
-                # "request_id": request_id,
-                "error_code": "database_error",
-                "message": "Unexpected database error occurred ",
-            }
-        }
+        media_type="application/json",
     )
 
 async def s3_exception_handler(request: Request, exc: S3Error):
@@ -177,19 +187,26 @@ async def s3_exception_handler(request: Request, exc: S3Error):
         extra={
             # "request_id": request_id,
             "s3_code": exc.code,
-            "path": str(request.url),
+            "path": request.url.path,
         },
         exc_info=True
     )
     
-    return JSONResponse(
+    if _IS_PROD:
+        return Response(
+            content=_S3_ERROR_PROD_BODY,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            media_type="application/json",
+        )
+    
+    return DefaultJSONResponse(
         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         content={
             "error": {
                 # "request_id": request_id,
                 "error_code": "storage_service_error",
                 "message": "Storage service temporarily unavailable",
-                "detail": {"s3_code": exc.code} if settings.ENVIRONMENT != "production" else None,
+                "detail": {"s3_code": exc.code},
             }
         }
     )
@@ -203,7 +220,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         f"Unhandled exception: {exc_type} - {str(exc)}",
         extra={
             # "request_id": request_id,
-            "path": str(request.url),
+            "path": request.url.path,
             "method": request.method,
             "user_agent": request.headers.get("user-agent"),
         },
@@ -213,7 +230,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     # 根据环境返回不同的错误信息
     error_message = sanitize_error_for_production(str(exc), exc_type)
     
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": {
@@ -232,6 +249,9 @@ def register_exception_handlers(app):
     app.add_exception_handler(BaseAppException, base_app_exception_handler)
     app.add_exception_handler(HTTPException, http_exception_passthrough_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    # 数据库异常按类型分别注册，由 Starlette 按异常类的 MRO 查找处理器，不再逐个 isinstance 判断
+    app.add_exception_handler(IntegrityError, integrity_error_handler)
+    app.add_exception_handler(OperationalError, operational_error_handler)
     app.add_exception_handler(SQLAlchemyError, sqlalchemy_exception_handler)
     app.add_exception_handler(S3Error, s3_exception_handler)
     app.add_exception_handler(Exception, global_exception_handler)
\ No newline at end of file
@@ -0,0 +1,44 @@
+# core/responses.py
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson  # 可选依赖：安装后默认响应使用 C 实现序列化
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    orjson = None
+
+# 应用默认响应类：优先 ORJSONResponse，未安装 orjson 时退回标准 JSONResponse
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def model_json_response(
+    content: Any,
+    adapter: Optional[TypeAdapter] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    直接序列化服务层已构造好的响应模型，跳过 FastAPI 按 response_model 的再次校验
+    - 路由上的 response_model 仍保留，用于生成 OpenAPI 文档
+    - 序列化由 pydantic-core 一次完成（model_dump_json / TypeAdapter.dump_json）
+    :param content: 响应模型实例，或配合 adapter 使用的模型列表
+    :param adapter: 序列化非 BaseModel 内容（如 List[Model]）时使用的 TypeAdapter
+    """
+    if adapter is not None:
+        body = adapter.dump_json(content)
+    elif isinstance(content, BaseModel):
+        body = content.model_dump_json()
+    else:
+        raise TypeError(f"Unsupported response content: {type(content).__name__}")
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def prebuilt_json_body(content: Any) -> bytes:
+    """
+    预先序列化内容固定的响应体（在模块加载时调用一次），与默认响应类输出一致
+    - 请求路径上直接用 Response(content=body, media_type="application/json") 返回，不再构造字典和序列化
+    """
+    return DefaultJSONResponse(content).body
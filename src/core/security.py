@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import jwt  # PyJWT
+import hmac
+import hashlib
 import secrets
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Response, Request
@@ -27,12 +29,24 @@ def verify_hash(plain_value: str, hashed_value: str) -> bool:
     return pwd_context.verify(plain_value, hashed_value)
 
 
+# Refresh Token 本身是高熵的随机签名令牌，入库时使用 HMAC-SHA256 摘要即可，无需 bcrypt 这类慢哈希
+_refresh_token_hmac_key = (
+    settings.REFRESH_TOKEN_HMAC_KEY.get_secret_value() or jwt_secret_key
+).encode()
+
+
+def hash_refresh_token(raw_token: str) -> str:
+    """计算 Refresh Token 的 HMAC-SHA256 摘要（十六进制，64 位）"""
+    return hmac.new(_refresh_token_hmac_key, raw_token.encode(), hashlib.sha256).hexdigest()
+
+
 def verify_refresh_token_in_db(raw_token: str, user: User) -> bool:
     """验证 Refresh Token 是否有效"""
     if not user.refresh_token:  # DB 中没有 Refresh Token
         return False
     
-    return verify_hash(plain_value=raw_token, hashed_value=user.refresh_token)
+    # 常量时间比较，防止时序攻击
+    return hmac.compare_digest(hash_refresh_token(raw_token), user.refresh_token)
 
 
 """TODO:
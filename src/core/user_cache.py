@@ -0,0 +1,57 @@
+# core/user_cache.py
+import time
+import logging
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.models.user import User
+
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = 30        # 已认证用户快照的缓存时间（秒）
+USER_CACHE_SIZE = 10000    # 最大缓存条目数
+
+# user_id -> (过期时间, 列值快照)
+_user_snapshots: Dict[UUID, Tuple[float, dict]] = {}
+
+
+def _snapshot(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+
+async def get_cached_user(db: AsyncSession, user_id: UUID) -> Optional[User]:
+    """
+    从进程内缓存取出用户，并以 merge(load=False) 挂到当前会话（不发出 SQL）
+    - 每次返回当前会话自己的持久化对象，请求之间不共享实例，可正常修改并提交
+    """
+    entry = _user_snapshots.get(user_id)
+    if entry is None:
+        return None
+    expires_at, data = entry
+    if expires_at <= time.monotonic():
+        _user_snapshots.pop(user_id, None)
+        return None
+
+    detached = User(**data)
+    make_transient_to_detached(detached)
+    return await db.merge(detached, load=False)
+
+
+def cache_user(user: User) -> None:
+    """缓存已从数据库加载的活跃用户"""
+    if len(_user_snapshots) >= USER_CACHE_SIZE:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in _user_snapshots.items() if expires_at <= now]:
+            del _user_snapshots[key]
+        while len(_user_snapshots) >= USER_CACHE_SIZE:
+            del _user_snapshots[next(iter(_user_snapshots))]
+    _user_snapshots[user.id] = (time.monotonic() + USER_CACHE_TTL, _snapshot(user))
+
+
+def invalidate_user(user_id: UUID) -> None:
+    """用户信息变更（修改密码、登出、停用等）后移除缓存"""
+    _user_snapshots.pop(user_id, None)
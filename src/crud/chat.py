@@ -1,8 +1,9 @@
 import logging
-from typing import Optional, List, Tuple, Dict, Any
+from datetime import datetime
+from typing import Optional, List, Tuple, Dict, Any, Callable
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func, delete
+from sqlalchemy import select, update, func, delete, or_, and_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.exc import IntegrityError
 
@@ -10,6 +11,7 @@ from src.models.chat import ChatSession, ChatMessage, ChatCall
 from src.core.exceptions import DatabaseError
 
 logger = logging.getLogger(__name__)
+
 class ChatCRUD():
     """
     处理聊天会话数据访问的类
@@ -43,8 +45,12 @@ class ChatCRUD():
         client_id: UUID,
         skip: int = 0,
         limit: int = 10,
-    ) -> Optional[List[Tuple[ChatSession, int]]]:
-        """获取用户的会话列表"""
+        convert: Optional[Callable[[ChatSession, int], Any]] = None,
+    ) -> List[Any]:
+        """
+        获取用户的会话列表
+        :param convert: 将 (会话, 消息数) 转换为响应对象，为空时返回元组
+        """
         conditions = [ChatSession.user_id == user_id]
         if user_id is not None:
             conditions.append(ChatSession.user_id == user_id)
@@ -63,8 +69,12 @@ class ChatCRUD():
             .group_by(ChatSession.id).offset(skip).limit(limit)
         )
         
+        # 分页结果有界，一次 execute 取回，不使用服务端游标
         result = await db.execute(stmt)
-        return [(session, count) for session, count in result.all()]
+        return [
+            convert(session, count) if convert else (session, count)
+            for session, count in result
+        ]
         
     async def get_messages_by_session_async(
         self,
@@ -84,26 +94,70 @@ class ChatCRUD():
                 ChatSession.client_id == client_id
             ])
             
+        # count() OVER () 随当前页一并返回总数，一次往返完成分页查询
         stmt = (
-            select(ChatMessage).select_from(ChatMessage)
+            select(ChatMessage, func.count().over().label("total")).select_from(ChatMessage)
             .join(ChatSession, ChatSession.id == ChatMessage.session_id)
             .where(*conditions)
-            .order_by(ChatMessage.created_at.desc())
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
             .offset(skip).limit(limit)
         )
     
-        result = await db.execute(stmt)
-        messages = result.scalars().all()
+        rows = (await db.execute(stmt)).all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        if not skip:
+            return [], 0
         
+        # 页码越界时结果为空，单独查询总数
         count_stmt = (
             select(func.count()).select_from(ChatMessage)
             .join(ChatSession, ChatSession.id == ChatMessage.session_id)
             .where(*conditions)
         )
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        return list(messages), total
+        total = (await db.execute(count_stmt)).scalar() or 0
+        return [], total
+
+    async def get_messages_by_session_keyset_async(
+        self,
+        db: AsyncSession,
+        session_id: UUID,
+        user_id: Optional[UUID],
+        client_id: UUID,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 20,
+    ) -> Tuple[List[ChatMessage], bool]:
+        """
+        游标分页获取会话消息：从 before=(created_at, id) 之后（更早）开始取 limit 条
+        - 直接按索引定位，不使用 OFFSET，也不统计总数
+        - 多取一条用于判断是否还有下一页
+        """
+        conditions = [ChatSession.id == session_id]
+        if user_id is not None:
+            conditions.append(ChatSession.user_id == user_id)
+        else:
+            conditions.extend([
+                ChatSession.user_id.is_(None),
+                ChatSession.client_id == client_id
+            ])
+        if before is not None:
+            created_at, last_id = before
+            conditions.append(or_(
+                ChatMessage.created_at < created_at,
+                and_(ChatMessage.created_at == created_at, ChatMessage.id < last_id),
+            ))
+
+        stmt = (
+            select(ChatMessage)
+            .join(ChatSession, ChatSession.id == ChatMessage.session_id)
+            .where(*conditions)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(limit + 1)
+        )
+
+        messages = list((await db.execute(stmt)).scalars().all())
+        has_more = len(messages) > limit
+        return messages[:limit], has_more
         
     async def create_session_async(
         self,
@@ -162,26 +216,22 @@ class ChatCRUD():
     ) -> int:
         """将未关联用户的会话关联到用户"""
         try:
-            stmt = select(ChatSession).where(
+            # 单条集合式 UPDATE 完成迁移；消息通过 session_id 归属会话，无需逐条更新
+            # 只需要迁移数量，使用 rowcount 而不是 RETURNING 回传全部 id
+            stmt = update(ChatSession).where(
                 ChatSession.client_id == client_id,
                 ChatSession.user_id.is_(None)
-            ).with_for_update()  # 在查询时对选定的行加锁
-
+            ).values(user_id=user_id).execution_options(synchronize_session=False)
+            
             result = await db.execute(stmt)
-            sessions = result.scalars().all()
+            migrated_count = result.rowcount
             
-            if not sessions:
+            if not migrated_count:
                 return 0
             
-            stmt = update(ChatSession).where(
-                ChatSession.client_id == client_id,
-                ChatSession.user_id.is_(None)
-            ).values(user_id=user_id)
-            
-            await db.execute(stmt)
             await db.commit()
             
-            return len(sessions)
+            return migrated_count
 
         except IntegrityError as e:
             await db.rollback()
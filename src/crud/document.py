@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, update, delete
-from typing import Optional, Tuple, List, Dict
+from sqlalchemy import select, func, update, delete, exists
+from typing import Optional, Tuple, List, Dict, Callable, Any
 from collections.abc import Sequence
 from uuid import UUID
 from sqlalchemy.exc import SQLAlchemyError
@@ -9,6 +9,7 @@ from datetime import datetime
 import logging
 
 from src.models.document import Document, StorageStatus
+from src.models.document_job import DocumentJob, DocumentJobType, DocumentJobStatus
 from src.schemas.document import DocumentCreate
 from src.utils.async_utils import run_in_async
 
@@ -65,6 +66,44 @@ class DocumentCRUD:
         db_doc = result.scalar_one_or_none()
         
         return db_doc
+
+    async def check_vectorization_status_async(
+        self,
+        db: AsyncSession,
+        id: UUID,
+        user_id: UUID
+    ) -> Tuple[bool, bool]:
+        """
+        单条查询同时判断文档归属与向量化状态
+        :param db: 异步数据库会话
+        :param id: 文档 ID
+        :param user_id: 用户 ID
+        :return: (文档是否存在且属于该用户, 最近一次向量化任务是否成功)
+        """
+        owned = exists().where(
+            Document.id == id,
+            Document.user_id == user_id,
+            Document.is_deleted == False,
+            Document.deleted_at.is_(None)
+        )
+        # 最近一次 EMBED_CHUNKS 任务的状态（无任务时为 NULL）
+        latest_embed_status = (
+            select(DocumentJob.status)
+            .where(
+                DocumentJob.document_id == id,
+                DocumentJob.job_type == DocumentJobType.EMBED_CHUNKS,
+            )
+            .order_by(DocumentJob.created_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = select(
+            owned.label("owned"),
+            func.coalesce(latest_embed_status == DocumentJobStatus.SUCCESS.value, False).label("vectorized"),
+        )
+        row = (await db.execute(stmt)).one()
+        
+        return bool(row.owned), bool(row.vectorized)
             
     def get_record_include_soft_delete(
         self,
@@ -125,76 +164,82 @@ class DocumentCRUD:
         self,
         db: AsyncSession,
         user_id: UUID,
-        page: int,
-        size: int
+        offset: int,
+        limit: int,
+        convert: Optional[Callable[[Document], Any]] = None,
     ):
         """
         # 分页查询用户文档列表
         :param db: 异步数据库会话
         :param user_id: 用户 ID
-        :param page: 页码（从 1 开始）
-        :param size: 每页记录数
+        :param offset: 跳过的记录数
+        :param limit: 每页记录数
+        :param convert: 转换文档对象（如转换为响应模型），为空时返回 ORM 对象
         :return: 返回文档列表和总记录数的元组
         """
-        offset = (page - 1) * size
+        conditions = (
+            Document.user_id == user_id,
+            Document.is_deleted == False,
+            Document.deleted_at.is_(None)
+        )
 
-        # 查询数据语句
+        # 窗口函数在同一结果集中返回总数，一次往返同时取得当前页和总记录数
         stmt = (
-            select(Document)
-            .where(
-                Document.user_id == user_id,
-                Document.is_deleted == False,
-                Document.deleted_at.is_(None)
-            )
-            .offset(offset).limit(size)
+            select(Document, func.count().over().label("total"))
+            .where(*conditions)
+            .offset(offset).limit(limit)
             .order_by(Document.created_at.desc())
         )
-        # 查询总数语句
-        cnt_stmt = (
-            select(func.count())
-            .select_from(Document)
-            .where(
-                Document.user_id == user_id,
-                Document.is_deleted == False,
-                Document.deleted_at.is_(None)
-            )
-        )
-        
-        # 执行数据查询
-        result = await db.execute(stmt)
-        items = result.scalars().all()  # 返回文档列表：Sequence[Document] 类型
-        
-        # 执行总数查询
-        total_result = await db.execute(cnt_stmt)
-        total = total_result.scalar() or 0
-        
-        return list(items), total 
+        return await self._fetch_page_with_total(db, stmt, conditions, offset, convert)
     
     async def get_multi_with_soft_deleted_async(
         self,
         db: AsyncSession,
-        page: int,
-        size: int,
-    ) -> Tuple[List[Document], int]:
+        offset: int,
+        limit: int,
+        convert: Optional[Callable[[Document], Any]] = None,
+    ) -> Tuple[List[Any], int]:
         """
         分页查询软删除的文档
+        :param convert: 转换文档对象（如转换为响应模型），为空时返回 ORM 对象
         """
-        skip = (page - 1) * size
-        
-        # 查询数据
-        stmt = select(Document).where(
+        conditions = (
             Document.is_deleted == True,
             Document.deleted_at.isnot(None)
-        ).offset(skip).limit(size).order_by(Document.created_at.desc())
-        result = await db.execute(stmt)
-        
-        # 返回文档列表：Sequence[Document] 类型
-        items = result.scalars().all()
-        
-        # 查询总数
-        total = len(items)
-        
-        return list(items), total
+        )
+
+        stmt = (
+            select(Document, func.count().over().label("total"))
+            .where(*conditions)
+            .offset(offset).limit(limit)
+            .order_by(Document.created_at.desc())
+        )
+        return await self._fetch_page_with_total(db, stmt, conditions, offset, convert)
+
+    @staticmethod
+    async def _fetch_page_with_total(
+        db: AsyncSession,
+        stmt,
+        conditions: tuple,
+        offset: int,
+        convert: Optional[Callable[[Document], Any]] = None,
+    ) -> Tuple[List[Any], int]:
+        """
+        执行带 count() OVER() 的分页查询，返回 (文档列表, 总记录数)
+        - 每行的 total 相同，取第一行即可
+        - 每页至多 100 行，一次 execute 取回（不用 yield_per：asyncpg 下会改走服务端游标，多出 DECLARE/FETCH 往返）
+        - 页码越界时结果为空，此时才单独查询总数
+        """
+        rows = (await db.execute(stmt)).all()
+        if rows:
+            items = [convert(row[0]) if convert else row[0] for row in rows]
+            return items, rows[0].total
+        if offset == 0:
+            return [], 0
+
+        cnt_stmt = select(func.count()).select_from(Document).where(*conditions)
+        total = (await db.execute(cnt_stmt)).scalar() or 0
+        return [], total
     
     def get_soft_deleted_by_id(
         self,
@@ -340,8 +385,8 @@ class DocumentCRUD:
         doc.deleted_at = deleted_at
         doc.updated_at = updated_at
         doc.version_id = version_id
+        # 字段均由调用方显式赋值（含 updated_at），flush 后无需 refresh
         db.flush()
-        db.refresh(doc)
         
         return doc
         
@@ -360,8 +405,8 @@ class DocumentCRUD:
         doc.updated_at = updated_at
         doc.version_id = version_id
         
+        # 字段均由调用方显式赋值（含 updated_at），flush 后无需 refresh
         db.flush()
-        db.refresh(doc)
         
         return doc
     
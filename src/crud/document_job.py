@@ -1,16 +1,61 @@
 import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, update, delete
+from sqlalchemy import select, func, update, delete, event, cast, Float
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
 
 from src.models.document import Document
 from src.models.document_job import DocumentJob, DocumentJobType, DocumentJobStatus
+from src.utils.cache import bump_versions_sync
 
 logger = logging.getLogger(__name__)
 
+# 任务查询接口的缓存命名空间（按文档 / 按 trace_id 分别维护版本号）
+DOC_JOBS_CACHE_NS = "docjobs"
+TRACE_JOBS_CACHE_NS = "tracejobs"
+_TOUCHED_JOBS_KEY = "document_jobs_touched"
+
+# 任务列表接口只需要的列：直接返回行元组，跳过 ORM 对象构造；执行时间在数据库中计算
+_JOB_SUMMARY_COLUMNS = (
+    DocumentJob.id,
+    DocumentJob.job_type,
+    DocumentJob.status,
+    DocumentJob.started_at,
+    DocumentJob.finished_at,
+    cast(
+        func.extract(
+            "epoch",
+            func.coalesce(DocumentJob.finished_at, func.now()) - DocumentJob.started_at,
+        ),
+        Float,
+    ).label("execution_time"),
+    DocumentJob.error_message,
+)
+
+
+def _touch_job_cache(db: Session, doc_id: UUID, trace_id: Optional[str] = None) -> None:
+    """记录本事务中状态发生变化的文档 / 链路，提交后统一失效对应缓存"""
+    touched = db.info.setdefault(_TOUCHED_JOBS_KEY, set())
+    touched.add((DOC_JOBS_CACHE_NS, str(doc_id)))
+    if trace_id:
+        touched.add((TRACE_JOBS_CACHE_NS, trace_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_job_cache(session: Session) -> None:
+    # 提交后再失效，避免并发读取在提交前把旧数据重新写回缓存
+    touched = session.info.pop(_TOUCHED_JOBS_KEY, None)
+    if touched:
+        bump_versions_sync(touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_job_cache_touches(session: Session) -> None:
+    session.info.pop(_TOUCHED_JOBS_KEY, None)
+
 
 class DocumentJobCRUD:
     
@@ -19,9 +64,10 @@ class DocumentJobCRUD:
         db: Session,
         document_job: DocumentJob
     ) -> DocumentJob:
+        # 服务端默认值（id、created_at 等）随 INSERT ... RETURNING 一并取回，无需再 refresh
         db.add(document_job)
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
         
         return document_job
         
@@ -97,30 +143,48 @@ class DocumentJobCRUD:
         doc_id: UUID,
         limit: int = 10,
         skip: int = 0
-    ):
-        stmt = select(DocumentJob).where(
+    ) -> List[Row]:
+        """按文档查询任务摘要（投影查询，返回行元组）"""
+        stmt = select(*_JOB_SUMMARY_COLUMNS).where(
             DocumentJob.document_id == doc_id,
         ).order_by(
             DocumentJob.created_at.desc()
         ).offset(skip).limit(limit)
         
         result = await db.execute(stmt)
-        jobs = result.scalars().all()
-        
-        return jobs
+        return result.all()
 
     async def get_document_jobs_by_trace_id_async(
         self,
         db: AsyncSession,
         trace_id: str,
-    ) -> List[DocumentJob]:
+        limit: Optional[int] = None,
+        skip: int = 0,
+    ) -> List[Row]:
+        """按 trace_id 查询任务摘要（投影查询，返回行元组）"""
         stmt = (
-            select(DocumentJob)
+            select(*_JOB_SUMMARY_COLUMNS)
             .where(DocumentJob.trace_id == trace_id)
             .order_by(DocumentJob.created_at.asc())
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def get_trace_summary_async(
+        self,
+        db: AsyncSession,
+        trace_id: str,
+    ) -> Dict[str, int]:
+        """按状态统计链路中的任务数量，返回 {status: count}"""
+        stmt = (
+            select(DocumentJob.status, func.count())
+            .where(DocumentJob.trace_id == trace_id)
+            .group_by(DocumentJob.status)
         )
         result = await db.execute(stmt)
-        return result.scalars().all()
+        return {status: count for status, count in result.all()}
     
     def delete_document_job(
         self,
@@ -131,6 +195,7 @@ class DocumentJobCRUD:
             DocumentJob.document_id == doc_id,
         )
         result = db.execute(stmt)
+        _touch_job_cache(db, doc_id)
         return result.rowcount > 0
         
     def mark_running(
@@ -143,7 +208,7 @@ class DocumentJobCRUD:
         document_job.job_type = job_type
         document_job.mark_running()
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
         
         return document_job
     
@@ -158,7 +223,7 @@ class DocumentJobCRUD:
         document_job.job_type = job_type
         document_job.mark_success(output_data)
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
         
         return document_job
     
@@ -173,7 +238,7 @@ class DocumentJobCRUD:
         document_job.job_type = job_type
         document_job.mark_failure(error_message)
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
         
         return document_job
              
@@ -187,7 +252,7 @@ class DocumentJobCRUD:
         document_job.job_type = job_type
         document_job.mark_retrying()
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
 
         return document_job
         
@@ -201,7 +266,7 @@ class DocumentJobCRUD:
         document_job.job_type = job_type
         document_job.mark_timeout()
         db.flush()
-        db.refresh(document_job)
+        _touch_job_cache(db, document_job.document_id, document_job.trace_id)
 
         return document_job
         
@@ -72,12 +72,10 @@ class UserCRUD:
         db: AsyncSession,
         user_id: UUID,
     ) -> Optional[User]:
-        stmt = select(User).where(
-            User.id == user_id,
-            User.is_active == True,
-        )
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
+        # 按主键获取：会话的 identity map 中已有该用户时不再发出 SQL
+        user = await db.get(User, user_id)
+        if user is None or not user.is_active:
+            return None
         
         return user
     
@@ -1,14 +1,22 @@
+import asyncio
 import logging
 import logging.config
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.v1.api_router import api_router
 from src.config.settings import settings
 from src.config.logging import logging_config, setup_log_record_factory
+from src.config.logging import start_log_listener, stop_log_listener
 from src.middleware.request_id import RequestIDMiddleware
 from src.middleware.request_id import request_id_ctx_var
 from src.core.exception_handlers import register_exception_handlers
+from src.core.responses import DefaultJSONResponse
+from src.core.depends import warm_up_clients, close_llm_client
+from src.api.v1.admin import refresh_metrics_loop
+from src.utils.redis_client import close_redis
+from src.utils.task_dispatcher import start_dispatcher, stop_dispatcher
 
 
 # 首先安装 LogRecordFactory
@@ -19,14 +27,44 @@ LOG_LEVEL = settings.APP_LOG_LEVEL or logging.INFO
 logging_config["root"]["level"] = LOG_LEVEL
 logging.config.dictConfig(logging_config)
 
+# 日志格式未使用线程/进程字段，关闭后每条日志记录不再采集这些信息
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
 # 获取日志记录器
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动后台任务，退出时释放资源"""
+    # 控制台 / 文件日志改由后台线程输出，避免在事件循环中阻塞 I/O
+    start_log_listener()
+    # 预先创建 LLM / 向量库 / MinIO 共享客户端
+    await warm_up_clients()
+    # 周期性刷新 Prometheus 指标，抓取请求不再访问数据库
+    metrics_task = asyncio.create_task(refresh_metrics_loop())
+    # Celery 任务投递消费者，路由只入队，不在请求路径上访问 Broker
+    start_dispatcher()
+    try:
+        yield
+    finally:
+        await stop_dispatcher()
+        metrics_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_task
+        await close_llm_client()
+        await close_redis()
+        stop_log_listener()
+
+
 # 创建 FastAPI 应用
 app = FastAPI(
     title="LLM App API",
     description="用于知识管理的 API 服务，提供用户管理、文档上传、问答检索等功能。",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
 )
 
 # 配置 CORS 中间件
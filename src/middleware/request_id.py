@@ -8,6 +8,8 @@ import logging
 
 # 用于存储请求 ID 的上下文变量
 request_id_ctx_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# 当前执行的 Celery 任务 ID（由 task_prerun / task_postrun 信号维护）
+task_id_ctx_var: ContextVar[Optional[str]] = ContextVar("task_id", default=None)
 
 class RequestIDMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
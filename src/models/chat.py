@@ -165,6 +165,8 @@ ChatMessage.__table_args__ = (
     Index("ix_chat_messages_session_id", "session_id"),
     Index("ix_chat_messages_role", "role"),
     Index("ix_chat_messages_created_at", "created_at"),
+    # 会话消息按 (created_at, id) 倒序的游标分页
+    Index("ix_chat_messages_session_created_id", "session_id", "created_at", "id"),
 )
 
 ChatCall.__table_args__ = (
@@ -10,6 +10,7 @@ from sqlalchemy import Enum as SA_Enum
 from datetime import datetime, timezone
 from enum import Enum
 from src.models import Base
+from src.utils.uuid7 import uuid7
 from src.models.document_job import DocumentJob
 from typing import TYPE_CHECKING, Optional, Dict, Any, List
 
@@ -43,6 +44,7 @@ class Document(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
+        default=uuid7,  # 时间有序的 UUIDv7，主键索引顺序写入
         server_default=text("gen_random_uuid()"),  # PostgreSQL 函数
         nullable=False,
     )
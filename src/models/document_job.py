@@ -10,6 +10,7 @@ from datetime import datetime, timezone
 from typing import Optional, Dict, Any, TYPE_CHECKING
 
 from src.models import Base
+from src.utils.uuid7 import uuid7
 import uuid
 
 if TYPE_CHECKING:
@@ -73,6 +74,7 @@ class DocumentJob(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
+        default=uuid7,  # 时间有序的 UUIDv7，主键索引顺序写入
         server_default=text("gen_random_uuid()"),
         nullable=False,
     )
@@ -236,6 +238,10 @@ class DocumentJob(Base):
         ),
         # {"schema": "public"}  # 指定表所在的schema
     )
+
+    # INSERT/UPDATE 时通过 RETURNING 取回服务端生成的列（id、created_at、updated_at），
+    # 状态写入后无需额外的 SELECT 刷新
+    __mapper_args__ = {"eager_defaults": True}
     
     # ======= 业务方法 =======
     def mark_running(self) -> None:
@@ -111,6 +111,8 @@ class User(Base):
         Index("ix_users_role", "role"),  # 角色查询
         Index("ix_users_deleted_at", "deleted_at"),  # 软删除查询
         Index("ix_users_is_deleted", "is_deleted"),
+        Index("ix_users_active", "id", postgresql_where=text("is_active")),  # 活跃用户计数（部分索引）
+        Index("ix_users_used_tokens_desc", text("used_tokens DESC")),  # 按用量排序的 top users
     )
     
     def __repr__(self) -> str:
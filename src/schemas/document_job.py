@@ -0,0 +1,57 @@
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Optional, List
+from uuid import UUID
+from datetime import datetime
+
+from src.models.document_job import DocumentJobType
+
+
+class JobSummary(BaseModel):
+    """文档处理任务摘要（任务查询接口的列表项，可由 ORM 对象或投影查询的行构造）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    # 从行数据构造时读取 id，从缓存的响应数据构造时读取 job_id
+    job_id: UUID = Field(..., validation_alias=AliasChoices("id", "job_id"), description="任务 ID")
+    job_type: DocumentJobType = Field(..., description="任务类型")
+    status: str = Field(..., description="任务状态")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    execution_time: Optional[float] = Field(None, description="执行时间（秒），由数据库计算")
+    error_message: Optional[str] = Field(None, description="错误信息")
+
+
+# 整个列表一次性交给 pydantic-core 校验和序列化，避免逐条构造 dict
+JOB_SUMMARY_LIST = TypeAdapter(List[JobSummary])
+
+
+def dump_job_summaries(jobs) -> List[dict]:
+    """将任务行（按属性读取字段）列表转换为可直接 JSON 序列化的字典列表"""
+    return JOB_SUMMARY_LIST.dump_python(
+        JOB_SUMMARY_LIST.validate_python(jobs, from_attributes=True),
+        mode="json",
+    )
+
+
+class DocumentJobsResponse(BaseModel):
+    """文档任务列表响应"""
+    doc_id: UUID = Field(..., description="文档 ID")
+    jobs: List[JobSummary] = Field(default_factory=list, description="任务列表")
+    limit: int = Field(..., description="返回记录数量限制")
+    skip: int = Field(..., description="跳过记录数量")
+
+
+class TraceSummary(BaseModel):
+    """链路任务状态统计"""
+    total: int = Field(..., description="任务总数")
+    success: int = Field(..., description="成功数")
+    failure: int = Field(..., description="失败数")
+    running: int = Field(..., description="执行中数量")
+
+
+class TraceJobsResponse(BaseModel):
+    """链路任务列表响应"""
+    trace_id: str = Field(..., description="链路 ID")
+    summary: TraceSummary
+    limit: int = Field(..., description="返回记录数量限制")
+    skip: int = Field(..., description="跳过记录数量")
+    jobs: List[JobSummary] = Field(default_factory=list, description="任务列表")
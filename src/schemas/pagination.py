@@ -1,4 +1,8 @@
-from typing import List, TypeVar, Type
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Tuple, TypeVar, Type
+from uuid import UUID
 from pydantic import BaseModel
 from math import ceil
 
@@ -9,6 +13,30 @@ T = TypeVar('T')
 PaginationResponseT = TypeVar('PaginationResponseT', bound=BaseModel)
 
 
+@dataclass(frozen=True)
+class Pagination:
+    """分页参数（page/size 已校验，offset 预先计算）"""
+    page: int
+    size: int
+    offset: int
+
+
+def encode_keyset_cursor(created_at: datetime, id: UUID) -> str:
+    """将最后一行的 (created_at, id) 编码为不透明的游标字符串"""
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """解析游标，格式非法时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(id)
+    except ValueError as e:  # 含 base64 / 解码 / 日期 / UUID 格式错误
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 def create_pagination_response(
         items: List[T],
         total: int,
@@ -29,10 +29,11 @@ class ChatMessageSchema(BaseModel):
 class ChatMessagePaginatedResponse(BaseModel, Generic[T]):
     """会话消息分页响应模型"""
     items: List[T] = Field(default_factory=list)
-    total: int = Field(..., ge=0, description="总记录数")
-    page: int = Field(..., ge=0, description="当前页码")
+    total: Optional[int] = Field(None, ge=0, description="总记录数（游标分页时不统计）")
+    page: Optional[int] = Field(None, ge=0, description="当前页码（游标分页时为空）")
     size: int = Field(..., ge=0, description="每页记录数")
-    pages: int = Field(..., ge=0, description="总页数")
+    pages: Optional[int] = Field(None, ge=0, description="总页数（游标分页时不统计）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多记录")
     
 # class SessionHistoryResponse(BaseModel):
 #     """历史会话响应模型"""
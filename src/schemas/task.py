@@ -94,6 +94,13 @@ class ScheduleDeletionResult(BaseTaskResult):
     expired_docs: List[dict] = Field(default_factory=list, description="过期文档列表")
     
 
+class TaskSubmitResponse(BaseModel):
+    """任务提交响应"""
+    task_id: str = Field(..., description="任务 ID（用于轮询进度）")
+    status: str = Field(..., description="任务状态", examples=["PENDING"])
+    message: Optional[str] = Field(None, description="附加消息")
+
+
 class TaskResultResponse(BaseModel):
     """任务查询响应"""
     task_id: str = Field(..., description="任务 ID")
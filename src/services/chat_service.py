@@ -29,6 +29,8 @@ from src.core.exceptions import (
 
 logger = logging.getLogger(__name__)
 
+_document_crud = DocumentCRUD()  # 无状态，模块内共享
+
 class ChatService:
     def __init__(
         self,
@@ -390,12 +392,10 @@ class ChatService:
         if not doc_ids:
             return []
                 
-        document_crud = DocumentCRUD()
-        
         # 批量查询数据库（或者遍历去重后的ID查询），建立映射表
         docs_map = {}
         for doc_id in doc_ids:
-            doc = await document_crud.get_by_doc_id_async(db, id=UUID(doc_id))
+            doc = await _document_crud.get_by_doc_id_async(db, id=UUID(doc_id))
             if doc:
                 docs_map[doc_id] = doc
         
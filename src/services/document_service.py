@@ -1,41 +1,33 @@
-import aiofiles
 import asyncio
 import hashlib
-import os
-import tempfile
 import uuid
 import mimetypes
 import logging
 from fastapi import UploadFile
-from fastapi import Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, update, delete
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from minio.error import S3Error, ServerError, InvalidResponseError
+from minio.error import S3Error
 from requests.exceptions import ConnectionError, Timeout, RequestException
-from pathlib import Path
+from urllib.parse import quote
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, BinaryIO, Tuple
 from uuid import UUID
-from io import BytesIO
-from fastapi.responses import StreamingResponse
-from fastapi import BackgroundTasks
+from fastapi.responses import Response, StreamingResponse
 from datetime import timezone, timedelta
-from celery import chain
 
 from src.utils.file_validator import sanitize_filename
 from src.utils.file_validator import validate_file_extension
 from src.utils.file_validator import validate_file_size_async
 from src.schemas.document import DocumentDetailResponse
+from src.schemas.pagination import Pagination
 from src.models.user import User
 from src.models.document import Document, StorageStatus
 from src.models.document_job import DocumentJob, DocumentJobType, DocumentJobStatus
 from src.crud.document import DocumentCRUD
 from src.crud.document_job import DocumentJobCRUD
-from src.utils.minio_storage import MinioClient
+from src.utils.minio_storage import get_shared_minio_client, UPLOAD_PART_SIZE
 from src.middleware.request_id import request_id_ctx_var
-from src.core.database import get_sync_db
 from src.core.exceptions import (
     ValidationError,
     BusinessLogicError,
@@ -48,49 +40,135 @@ from src.core.exceptions import (
 
 logger = logging.getLogger(__name__)
 
-# 获取环境变量
-temp_upload_dir = os.getenv("TEMP_UPLOAD_DIR")
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 下载时每次转发的字节数（1 MiB）
 
-# 转换为Path对象
-if temp_upload_dir:
-    TEMP_UPLOAD_DIR = Path(temp_upload_dir)
-else:
-    # print("tempfile.gettempdir(): ", tempfile.gettempdir())
-    TEMP_UPLOAD_DIR = Path(tempfile.gettempdir()) / "llm-ai-service" / "tmp" / "uploads"
+
+class _RangeNotSatisfiable(Exception):
+    """Range 语法有效但与文件大小不相交，应返回 416"""
+
+
+def _parse_range_header(range_header: Optional[str], size: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    解析单段 Range 请求头（bytes=start-end / bytes=start- / bytes=-suffix）
+    - 语法无效（非数字、end < start、多段等）时按 RFC 9110 忽略 Range，返回 None（按完整内容返回）
+    - 语法有效但不可满足（start 超出文件末尾、bytes=-0）时抛出 _RangeNotSatisfiable
+    :return: (start, end) 闭区间；无 Range 或忽略时返回 None
+    """
+    if not range_header or not size or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None  # 不支持多段范围
+    start_s, end_s = (part.strip() for part in spec.split("-", 1))
+    if not (start_s or end_s) or not all(p.isdigit() for p in (start_s, end_s) if p):
+        return None
     
-# 确保目录存在
-TEMP_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)         
+    if start_s:
+        start = int(start_s)
+        end = int(end_s) if end_s else None
+        if end is not None and end < start:
+            return None  # 语法无效，忽略
+        if start >= size:
+            raise _RangeNotSatisfiable()
+        return start, size - 1 if end is None else min(end, size - 1)
+    
+    suffix = int(end_s)
+    if suffix == 0:
+        raise _RangeNotSatisfiable()
+    return max(size - suffix, 0), size - 1
+
+
+class _HashingReader:
+    """包装文件对象：在被读取（上传）的同时计算 SHA256 和字节数，避免额外读一遍文件"""
+
+    def __init__(self, file_obj: BinaryIO):
+        self._file = file_obj
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        if chunk:
+            self._hash.update(chunk)
+            self.size += len(chunk)
+        return chunk
+
+    @property
+    def checksum(self) -> str:
+        return self._hash.hexdigest()
+
 
 class DocumentService:
     def __init__(self):
         self.document_crud = DocumentCRUD()
-        self.mino_client = MinioClient()
+        self.mino_client = get_shared_minio_client()
                     
     async def preprocessing_file(
         self, 
         upload_file: UploadFile,
+        user_id: Optional[UUID] = None,
     ) -> Dict[str, Any]:
         """
         统一文档处理入口
-        - 上传文档到对象存储，并保存元数据到数据库
-        - 文档内容提取和向量化存储
+        - 校验文件后直接流式上传到对象存储（不落本地临时文件），同时计算校验和
+        - 返回上传结果，供后台任务登记元数据、提取内容和向量化
         """
-        # 从上下文获取 request_id
-        request_id = request_id_ctx_var.get()
         logger.info(f"Starting document upload")
         
         # 文件验证
         filename, file_ext = await self._validate_file(upload_file)
 
-        # 生成安全文件名
-        safe_filename = f"{uuid.uuid4().hex}{file_ext}"
-        temp_path = TEMP_UPLOAD_DIR / safe_filename
-               
-        # 异步流式写入临时文件      
-        await self._save_temp_file(upload_file, temp_path)
-        
-        return filename, temp_path
+        # 生成对象存储 key
+        ext = file_ext[1:].lower() if file_ext else 'bin'
+        upload_time = datetime.now(timezone.utc)
+        storage_path = upload_time.strftime("%Y/%m/%d")
+        file_id = str(uuid.uuid4().hex)
+        storage_key = f"uploads/{storage_path}/{file_id}.{ext}"
+        
+        # 获取文件类型
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        
+        # 生成文件元数据
+        metadata = {
+            "x-meta-file-id": file_id,
+            "x-meta-user-id": str(user_id),
+            "x-meta-upload-time": upload_time.isoformat(),  # 必须是字符串
+            "x-meta-original-filename": filename,
+        }
+        
+        reader = _HashingReader(upload_file.file)
+        result = await self._stream_to_storage(reader, storage_key, content_type, metadata)
+        
+        return {
+            "filename": filename,
+            "storage_key": storage_key,
+            "file_extension": ext,
+            "content_type": content_type,
+            "checksum": reader.checksum,
+            "size_bytes": reader.size,
+            "etag": result.etag,
+            "version_id": result.version_id,
+        }
+        
+        
+    async def discard_uploaded_file(self, storage_key: str) -> None:
+        """
+        删除已上传但未能进入处理流程的对象（任务投递失败等），避免对象存储中残留孤儿文件
+        - 删除失败只记录警告，不影响调用方的错误处理
+        """
+        try:
+            await asyncio.to_thread(self.mino_client.permanent_delete_document, object_name=storage_key)
+            logger.info(f"Discarded uploaded object: {storage_key}")
+        except Exception as e:
+            logger.warning(f"Failed to discard uploaded object {storage_key}: {e}")
         
+    def _delete_replaced_object(self, storage_key: str) -> None:
+        """删除被重新上传替换掉的旧对象（记录已指向新对象，删除失败只记录警告）"""
+        try:
+            self.mino_client.permanent_delete_document(object_name=storage_key)
+            logger.info(f"Deleted replaced object: {storage_key}")
+        except Exception as e:
+            logger.warning(f"Failed to delete replaced object {storage_key}: {e}")
         
     async def _validate_file(self, upload_file: UploadFile):
         """文件验证"""
@@ -104,105 +182,74 @@ class DocumentService:
         # 检查文件类型
         file_ext = await validate_file_extension(filename)
         
-        # 检查文件大小
-        await validate_file_size_async(upload_file.file)
+        # 检查文件大小（优先使用解析 multipart 时已记录的大小，不再逐块读取整个文件）
+        await validate_file_size_async(upload_file.file, size=upload_file.size)
         
         return filename, file_ext
     
-    async def _save_temp_file(self, upload_file: UploadFile, temp_path: str):
-        """异步流式写入文件"""
+    async def _stream_to_storage(
+        self,
+        reader: "_HashingReader",
+        storage_key: str,
+        content_type: str,
+        metadata: dict,
+    ):
+        """分片流式上传到 MinIO/S3（SDK 为同步实现，放到线程中执行）"""
         try:
-            await asyncio.wait_for(
-                self._write_file_stream(upload_file, temp_path),
-                timeout=30.0  # 设置超时时间，防止文件写入时间过长
-            ) 
-            
-            # 检查文件是否成功写入
-            if not temp_path.exists():
-                # 这是系统级错误，非用户请求错误
-                raise ExternalServiceError(
-                    service_name="File System",
-                    message="Temporary file write failed",
-                    details={"temp_path": str(temp_path)}
-                )
-            if temp_path.stat().st_size == 0:
-                # 业务逻辑错误（不允许空文件）
-                raise BusinessLogicError(
-                    message="Uploaded file is empty",
-                    details={"filename": upload_file.filename}
-                )
+            return await asyncio.to_thread(
+                self.mino_client.upload_fileobj,
+                object_name=storage_key,
+                data=reader,
+                length=-1,
+                part_size=UPLOAD_PART_SIZE,
+                content_type=content_type,
+                metadata=metadata,
+            )
+        # 网络层面的错误 (连接超时、DNS解析失败等)
+        except (ConnectionError, Timeout, RequestException) as net_exc:
+            logger.warning(f"Network error while uploading file to MinIO: {net_exc}")
+            raise ExternalServiceError(
+                service_name="MinIO/S3",
+                message="Connection to storage service failed",
+                details={"original_error": str(net_exc)},
+            ) from net_exc
+        # MinIO/S3 服务端错误响应
+        except S3Error as s3e:
+            logger.error(f"MinIO S3Error: {s3e.code} - {s3e.message}")
+            if s3e.code == "AccessDenied":
+                msg = "Storage permission denied (Access Denied)"
+            elif s3e.code == "NoSuchBucket":
+                msg = "Storage bucket does not exist"
+            else:
+                msg = f"Storage service return error: {s3e.code}"
                 
-            logger.info(f"Temporary file written: {temp_path}, size: {temp_path.stat().st_size}") 
-          
-        except asyncio.TimeoutError:
-            logger.error(f"File write timeout: {upload_file.filename}")
-            # 清理临时文件
-            self._cleanup_temp_file(temp_path)
             raise ExternalServiceError(
-                service_name="File System",
-                message="File write timeout",
-                details={"timeout": 30.0}
-            )
-        except (BusinessLogicError, ExternalServiceError):
-            # 业务异常直接向上抛，抛出前清理文件
-            self._cleanup_temp_file(temp_path)
-            raise
+                service_name="MinIO/S3",
+                message=msg,
+                details={"s3_code": s3e.code, "s3_message": s3e.message}
+            ) from s3e
         except Exception as e:
-            logger.error(f"Failed to write temporary file {temp_path}: {e}", exc_info=True)
-            # 清理临时文件
-            self._cleanup_temp_file(temp_path)
+            logger.error(f"Unexpected MinIO upload error: {e}", exc_info=True)
             raise ExternalServiceError(
-                service_name="File System",
-                message="Unexpected error during file write",
+                service_name="MinIO/S3",
+                message="Unexpected error during file upload",
                 details={"error": str(e)}
             ) from e
-        
-    async def _write_file_stream(self, upload_file: UploadFile, filepath: str):
-        """流式写入文件的内部协程"""
-        async with aiofiles.open(filepath, "wb") as f:
-            while chunk := await upload_file.read(8192):
-                await f.write(chunk)
-                
-    def _cleanup_temp_file(self, path: Path):
-        """同步清理文件（在异常处理块中，简单处理）"""
-        try:
-            if path.exists():
-                path.unlink()
-        except Exception as e:
-            logger.warning(f"Failed to cleanup temp file {path}: {e}")
-                
-    def calc_hash_and_size(
-        self,
-        temp_path: Path,
-    ):
-        # 计算文件哈希和大小
-        hash_sha256 = hashlib.sha256()
-        file_size = 0 
-        try:
-            with open(temp_path, 'rb') as f:
-                while chunk := f.read(8192):
-                    hash_sha256.update(chunk)
-                    file_size += len(chunk)
-            checksum = hash_sha256.hexdigest()
-            
-            return checksum, file_size
-        
-        except Exception as e:
-            raise Exception(f"Failed to read temporary file {temp_path}: {e}")
                 
     def upload_document(
         self,
         db: Session,
         user_id: UUID,
         # doc_id: Optional[UUID],
-        filename: str,
-        temp_path: Path, 
+        upload_info: Dict[str, Any],
         context: dict,
     ):  
-        """上传文档"""
+        """登记已上传到对象存储的文档（文件已由 API 流式写入 MinIO，此处只处理去重和数据库记录）"""
+        filename = upload_info["filename"]
         try:
             # 检查是否存在重复文件
-            checksum, file_size = self.calc_hash_and_size(temp_path)
+            checksum = upload_info["checksum"]
+            file_size = upload_info["size_bytes"]
             document_crud = DocumentCRUD()
             existing_doc = document_crud.get_by_checksum_and_user(
                 db=db,
@@ -287,74 +334,21 @@ class DocumentService:
                     
             document_job_crud.mark_running(db, validate_job, job_type)
                     
-            # 生成对象存储 key
-            suffix = Path(filename).suffix
-            ext = suffix[1:].lower() if suffix else 'bin'
-            upload_time = datetime.now(timezone.utc)
-            storage_path = upload_time.strftime("%Y/%m/%d")
-            file_id = str(uuid.uuid4().hex)
-            new_storage_key = f"uploads/{storage_path}/{file_id}.{ext}"
-            
-            storage_key = validata_doc.storage_key if validata_doc.storage_key else new_storage_key
-            
-            # 获取文件类型
-            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-            
-            # 生成文件元数据
-            metadata = {
-                "x-meta-file-id": file_id,
-                "x-meta-user-id": str(user_id),
-                "x-meta-upload-time": upload_time.isoformat(),  # 必须是字符串
-                "x-meta-original-filename": filename,
-            }
-            
-            # 上传到对象存储 MinIO/S3
-            try:
-                result = self.mino_client.upload_file(
-                    object_name=storage_key,
-                    file_path=str(temp_path),
-                    content_type=content_type,
-                    metadata=metadata,
-                )
-                logger.info(
-                    f"Uploaded to MinIO | ETag={result.etag} | VersionID={result.version_id}"
-                )
-            
-            # 网络层面的错误 (连接超时、DNS解析失败等)
-            except (ConnectionError, Timeout, RequestException) as net_exc:
-                logger.warning(f"Network error while uploading file to MinIO: {net_exc}")
-                raise ExternalServiceError(
-                    service_name="MinIO/S3",
-                    message="Connection to storage service failed",
-                    details={"original_error": str(net_exc)},
-                ) from net_exc
-            # MinIO/S3 服务端错误响应
-            except S3Error as s3e:
-                logger.error(f"MinIO S3Error: {s3e.code} - {s3e.message}")
-                if s3e.code == "AccessDenied":
-                    msg = "Storage permission denied (Access Denied)"
-                elif s3e.code == "NoSuchBucket":
-                    msg = "Storage bucket does not exist"
-                else:
-                    msg = f"Storage service return error: {s3e.code}"
-                    
-                raise ExternalServiceError(
-                    service_name="MinIO/S3",
-                    message=msg,
-                    details={"s3_code": s3e.code, "s3_message": s3e.message}
-                ) from s3e
-            except Exception as e:
-                logger.error(f"Unexpected MinIO upload error: {e}", exc_info=True)
-                raise 
+            storage_key = upload_info["storage_key"]
+            ext = upload_info["file_extension"]
+            content_type = upload_info["content_type"]
             
             # 构建元数据
             doc_metadata = {
                 "storage": {
-                    "etag": result.etag,
-                    "version_id": result.version_id,
+                    "etag": upload_info["etag"],
+                    "version_id": upload_info["version_id"],
                 }
             }
             
+            # 重新上传已有文档时记录旧对象，数据库更新提交后删除
+            previous_storage_key = validata_doc.storage_key
+            
             # 更新数据库    
             validata_doc = document_crud.update_record_for_doc(
                 db=db,
@@ -364,7 +358,7 @@ class DocumentService:
                 content_type=content_type,
                 storage_key=storage_key,
                 storage_status=StorageStatus.ACTIVE.value,
-                version_id=result.version_id,
+                version_id=upload_info["version_id"],
                 doc_metadata=doc_metadata,
             )
             if not validata_doc:
@@ -398,6 +392,9 @@ class DocumentService:
             document_job_crud.mark_success(db, validate_job, job_type, output_data)
             db.commit()
             
+            if previous_storage_key and previous_storage_key != storage_key:
+                self._delete_replaced_object(previous_storage_key)
+            
             logger.info(f"{job_type.value} job completed successfully for document {validata_doc.id}.")
             
             return result
@@ -501,8 +498,7 @@ class DocumentService:
         self,
         db: AsyncSession,
         user: User,
-        page: int,
-        size: int,
+        pagination: Pagination,
     ) -> tuple[List[DocumentDetailResponse], int]:
         """
         列出用户的所有文档
@@ -511,11 +507,11 @@ class DocumentService:
             items, total = await self.document_crud.get_multi_by_user_async(
                 db=db, 
                 user_id=user.id, 
-                page=page,
-                size=size
+                offset=pagination.offset,
+                limit=pagination.size,
+                # 查询取回当页结果后，由 convert 回调将 ORM 模型转换为 Pydantic 响应模型
+                convert=DocumentDetailResponse.model_validate,
             )
-            # 将 ORM 模型转换为 Pydantic 响应模型
-            items = [DocumentDetailResponse.model_validate(item) for item in items]
             
             return items, total
         
@@ -531,8 +527,7 @@ class DocumentService:
     async def list_documents_with_soft_deleted(
         self,
         db: AsyncSession,
-        page: int,
-        size: int,
+        pagination: Pagination,
     ) -> tuple[List[DocumentDetailResponse], int]:
         """
         列出所有软删除的文档
@@ -540,11 +535,11 @@ class DocumentService:
         try:
             items, total = await self.document_crud.get_multi_with_soft_deleted_async(
                 db=db,
-                page=page,
-                size=size,
+                offset=pagination.offset,
+                limit=pagination.size,
+                # 查询取回当页结果后，由 convert 回调将 ORM 模型转换为 Pydantic 响应模型
+                convert=DocumentDetailResponse.model_validate,
             )
-            # 将 ORM 模型转换为 Pydantic 响应模型
-            items = [DocumentDetailResponse.model_validate(item) for item in items]
             
             return items, total
         
@@ -586,7 +581,9 @@ class DocumentService:
         
         try:
             from src.workers.document.object_storage import soft_delete_document_task
-            soft_delete_task = soft_delete_document_task.apply_async(
+            # apply_async 同步访问 Broker，放到线程中执行，避免阻塞事件循环
+            soft_delete_task = await asyncio.to_thread(
+                soft_delete_document_task.apply_async,
                 kwargs={
                     "doc_id": str(doc_id),
                     "user_id": str(user.id),
@@ -627,7 +624,9 @@ class DocumentService:
         
         try:
             from src.workers.document.object_storage import restore_document_task
-            restore_task = restore_document_task.apply_async(
+            # apply_async 同步访问 Broker，放到线程中执行，避免阻塞事件循环
+            restore_task = await asyncio.to_thread(
+                restore_document_task.apply_async,
                 kwargs={
                     "doc_id": str(doc_id), 
                     "user_id": str(user.id), 
@@ -658,7 +657,9 @@ class DocumentService:
     ):
         try:
             from src.workers.document.object_storage import permanent_delete_document_task
-            result = permanent_delete_document_task.apply_async(
+            # apply_async 同步访问 Broker，放到线程中执行，避免阻塞事件循环
+            result = await asyncio.to_thread(
+                permanent_delete_document_task.apply_async,
                 kwargs={
                     "doc_id": str(doc_id),
                     "user_id": str(user.id)
@@ -690,7 +691,9 @@ class DocumentService:
     ):
         try:
             from src.workers.document.object_storage import permanent_delete_from_s3_task
-            result = permanent_delete_from_s3_task.apply_async(
+            # apply_async 同步访问 Broker，放到线程中执行，避免阻塞事件循环
+            result = await asyncio.to_thread(
+                permanent_delete_from_s3_task.apply_async,
                 kwargs={
                     "user_id": str(user.id),
                     "storage_key": storage_key
@@ -719,7 +722,9 @@ class DocumentService:
         request_id = request_id_ctx_var.get()
         try:
             from src.workers.document.object_storage import list_objects_from_s3_task
-            async_result = list_objects_from_s3_task.apply_async(
+            # apply_async 同步访问 Broker，放到线程中执行，避免阻塞事件循环
+            async_result = await asyncio.to_thread(
+                list_objects_from_s3_task.apply_async,
                 args=(prefix,),
                 headers={"request_id": request_id},
             )
@@ -798,8 +803,9 @@ class DocumentService:
         db: AsyncSession,
         user_id: UUID,
         doc_id: UUID,
+        range_header: Optional[str] = None,
     ) -> StreamingResponse:
-        """下载文档内容流（直接流式转发）"""
+        """下载文档内容流（直接流式转发，支持 Range 断点续传）"""
         doc = await self.document_crud.get_by_id_async(db, doc_id, user_id)
         if not doc:
             raise NotFoundError(resource="Document", resource_id=doc_id)
@@ -808,16 +814,34 @@ class DocumentService:
             raise BusinessLogicError(message="Document has no storage key")
         
         try:
+            try:
+                byte_range = _parse_range_header(range_header, doc.size_bytes)
+            except _RangeNotSatisfiable:
+                return Response(
+                    status_code=416,
+                    headers={"Content-Range": f"bytes */{doc.size_bytes}", "Accept-Ranges": "bytes"},
+                )
+            offset, length = (byte_range[0], byte_range[1] - byte_range[0] + 1) if byte_range else (0, 0)
+            
             # 从 MinIO 获取原始响应流（urllib3.response.HTTPResponse）
-            minio_response = self.mino_client.get_object(
-                storage_key=doc.storage_key
+            # SDK 为同步实现，建立连接放到线程中执行，避免阻塞事件循环
+            minio_response = await asyncio.to_thread(
+                self.mino_client.get_object,
+                storage_key=doc.storage_key,
+                offset=offset,
+                length=length,
             )
             
-            # 定义生成器，分块读取，避免内存溢出
-            def stream_generator():
+            # 异步生成器逐块转发，内存中只保留一个分块；读取在线程中执行
+            # 客户端断开时取消会在 await 处抛入生成器，finally 立即释放 MinIO 连接，
+            # 不依赖同步生成器被垃圾回收
+            async def stream_generator():
+                chunks = minio_response.stream(DOWNLOAD_CHUNK_SIZE)
                 try:
-                    # 每次读取 32KB
-                    for chunk in minio_response.stream(32 * 1024):
+                    while True:
+                        chunk = await asyncio.to_thread(next, chunks, None)
+                        if chunk is None:
+                            break
                         yield chunk
                 finally:
                     # 确保流关闭，释放连接
@@ -825,23 +849,34 @@ class DocumentService:
                     minio_response.release_conn()
             
             # 对文件名进行 URL 编码，纯 ASCII 的字符串，符合 HTTP 头标准
-            from urllib.parse import quote
             encoded_filename = quote(doc.filename)
+            headers = {
+                # 使用 RFC 5987 标准格式
+                "Content-Disposition": f"attachment; filename*=utf-8''{encoded_filename}",  # 处理非 ASCII 文件名
+                "Accept-Ranges": "bytes",
+            }
+            etag = ((doc.doc_metadata or {}).get("storage") or {}).get("etag")
+            if etag:
+                headers["ETag"] = f'"{etag}"'
+            
+            if byte_range:
+                headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{doc.size_bytes}"
+                headers["Content-Length"] = str(length)
+                status_code = 206
+            else:
+                if doc.size_bytes is not None:
+                    headers["Content-Length"] = str(doc.size_bytes)  # 告诉前端进度条
+                status_code = 200
             
             # 返回流式响应  
             return StreamingResponse(
                 stream_generator(),
+                status_code=status_code,
                 media_type=doc.content_type or "application/octet-stream",
-                headers={
-                    # 使用 RFC 5987 标准格式
-                    "Content-Disposition": f"attachment; filename*=utf-8''{encoded_filename}",  # 处理非 ASCII 文件名
-                    "Content-Length": str(doc.size_bytes) # 告诉前端进度条
-                }
+                headers=headers,
             )
         
-        except NotFoundError:
-            raise
-        except BusinessLogicError:
+        except (NotFoundError, BusinessLogicError, ValidationError):
             raise
         except S3Error as e:
             logger.error(f"MinIO S3Error during document download: {e.code} - {e.message}", exc_info=True)
@@ -882,8 +917,9 @@ class DocumentService:
                 raise NotFoundError(resource="Document", resource_id=doc_id)
             
             # 生成预签名链接
-            minio_client = MinioClient()
-            presigned_url = minio_client.get_presigned_url(
+            # 预签名可能需要查询桶所在区域（网络请求），放到线程中执行
+            presigned_url = await asyncio.to_thread(
+                self.mino_client.get_presigned_url,
                 object_name=doc.storage_key,
                 expires=timedelta(seconds=expires_in),
                 response_headers={
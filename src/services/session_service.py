@@ -9,11 +9,24 @@ from src.models.user import User
 from src.schemas.session import SessionResponse
 from src.schemas.session import ChatMessageSchema, ChatMessagePaginatedResponse
 from src.schemas.pagination import create_pagination_response
-from src.core.exceptions import DatabaseError, NotFoundError
+from src.schemas.pagination import encode_keyset_cursor, decode_keyset_cursor
+from src.core.exceptions import DatabaseError, NotFoundError, ValidationError
 
 logger = logging.getLogger(__name__)
 
 
+def _to_session_response(session, message_count: int) -> SessionResponse:
+    return SessionResponse(
+        id=session.id,
+        user_id=session.user_id,
+        client_id=session.client_id,
+        title=session.title,
+        created_at=session.created_at,
+        updated_at=session.updated_at,
+        message_count=message_count,
+    )
+
+
 class SessionService:
     def __init__(
         self,
@@ -31,30 +44,16 @@ class SessionService:
     ) -> List[SessionResponse]:
         """获取用户会话列表"""
         try:
-            sessions = await self.chat_crud.get_multi_sessions_by_user_async(
+            # 查询取回当页结果后，由 convert 回调将 (会话, 消息数) 转换为响应对象
+            return await self.chat_crud.get_multi_sessions_by_user_async(
                 db,
                 user_id=user.id if user else None,
                 client_id=client_id,
                 skip=skip,
                 limit=limit,
+                convert=_to_session_response,
             )
             
-            if not sessions:
-                return []
-            
-            # 构建会话响应对象列表
-            return [
-                SessionResponse(
-                    id=session.id,
-                    user_id=session.user_id,
-                    client_id=session.client_id,
-                    title=session.title,
-                    created_at=session.created_at,
-                    updated_at=session.updated_at,
-                    message_count=message_count  
-                ) for session, message_count in sessions
-            ]
-            
         except SQLAlchemyError as e:
             logger.error(f"Database error during list sessions: {str(e)}", exc_info=True)
             raise DatabaseError(message="Failed to list sessions due to database error") from e
@@ -71,18 +70,41 @@ class SessionService:
         client_id: UUID,
         page: int = 1,
         size: int = 20,
+        cursor: Optional[str] = None,
     ) -> ChatMessagePaginatedResponse[ChatMessageSchema]:
-        """获取会话历史记录"""
+        """
+        获取会话历史记录
+        - 传入 cursor 时按 (created_at, id) 游标分页，深翻页无需 OFFSET 扫描，不统计总数
+        - 未传 cursor 时按 page/size 分页（适合前几页），同样返回 next_cursor 便于切换到游标分页
+        """
+        before = None
+        if cursor:
+            try:
+                before = decode_keyset_cursor(cursor)
+            except ValueError:
+                raise ValidationError(message="Invalid cursor", details={"cursor": cursor})
+
         skip = (page - 1) * size
         try:
-            messages, total = await self.chat_crud.get_messages_by_session_async(
-                db=db, 
-                session_id=session_id, 
-                user_id=user.id if user else None,
-                client_id=client_id,
-                skip=skip,
-                limit=size,
-            )
+            if before is not None:
+                messages, has_more = await self.chat_crud.get_messages_by_session_keyset_async(
+                    db=db,
+                    session_id=session_id,
+                    user_id=user.id if user else None,
+                    client_id=client_id,
+                    before=before,
+                    limit=size,
+                )
+            else:
+                messages, total = await self.chat_crud.get_messages_by_session_async(
+                    db=db, 
+                    session_id=session_id, 
+                    user_id=user.id if user else None,
+                    client_id=client_id,
+                    skip=skip,
+                    limit=size,
+                )
+                has_more = skip + len(messages) < total
             
             # 将消息对象转换为响应模式
             messages_schemas = [
@@ -96,14 +118,28 @@ class SessionService:
                 ) for msg in messages
             ]
             
+            next_cursor = None
+            if has_more and messages:
+                last = messages[-1]
+                next_cursor = encode_keyset_cursor(last.created_at, last.id)
+            
+            if before is not None:
+                return ChatMessagePaginatedResponse[ChatMessageSchema](
+                    items=messages_schemas,
+                    size=size,
+                    next_cursor=next_cursor,
+                )
+            
             # 返回分页响应
-            return create_pagination_response(
+            response = create_pagination_response(
                 items=messages_schemas,
                 total=total,
                 page=page,
                 size=size,
                 response_model=ChatMessagePaginatedResponse[ChatMessageSchema]
             )
+            response.next_cursor = next_cursor
+            return response
         
         except SQLAlchemyError as e:
             logger.error(f"Database error during get session history: {str(e)}", exc_info=True)
@@ -16,6 +16,7 @@ from src.schemas.user import PasswordResetConfirm, PasswordChangeRequest
 from src.models.user import User
 from src.crud.user import UserCRUD
 from src.core import security
+from src.core import user_cache
 from src.config.settings import settings
 from src.utils import mailer
 from src.workers.user.email_notification import (
@@ -86,7 +87,7 @@ class UserService:
                 # 创建新用户
                 logger.info(f"Creating new user: {user_in.email}")
                 # 密码哈希处理
-                hashed_pw = security.create_hash(user_in.password)
+                hashed_pw = await asyncio.to_thread(security.create_hash, user_in.password)
                 # 新用户注册后暂不激活，需要邮箱确认
                 new_user = await self.user_crud.create_user_async(
                     self.db,
@@ -254,21 +255,26 @@ class UserService:
                 username_or_email=username_or_email,
             )
             
-            verified_result = security.verify_hash(plain_value=password, hashed_value=user.hashed_password)
-            
             # 统一错误信息，防止枚举攻击
-            if user and user.is_active is False:
+            if not user or user.is_active is False:
                 raise AuthenticationError(message="Invalid credentials")
-            if not user or not verified_result:
+
+            # bcrypt 校验为 CPU 密集操作，放到线程中执行，避免阻塞事件循环
+            verified_result = await asyncio.to_thread(
+                security.verify_hash, plain_value=password, hashed_value=user.hashed_password
+            )
+            if not verified_result:
                 raise AuthenticationError(message="Invalid credentials")
             
             # 创建访问令牌和刷新令牌
-            access_token = security.create_access_token(data={"sub": str(user.id)})
-            refresh_token = security.create_refresh_token(data={"sub": str(user.id)})
+            access_token = security.create_access_token(data={"sub": user.id.hex})
+            refresh_token = security.create_refresh_token(data={"sub": user.id.hex})
 
             # 存储 refresh_token（用于封禁或单点登录）
-            user.refresh_token = security.create_hash(value=refresh_token)
+            user.refresh_token = security.hash_refresh_token(refresh_token)
             await self.db.commit()
+            # 缓存的用户快照含旧的 refresh_token，登出时需读到新值
+            user_cache.invalidate_user(user.id)
 
             # 写入 HttpOnly Cookie
             security.set_refresh_token_cookie(response=response, refresh_token=refresh_token)
@@ -332,12 +338,13 @@ class UserService:
                 raise AuthenticationError(message="Invalid credentials")
             
             # 生成新的 access_token 和 refresh_token
-            new_access_token = security.create_access_token(data={"sub": str(user.id)})
-            new_refresh_token = security.create_refresh_token(data={"sub": str(user.id)})
+            new_access_token = security.create_access_token(data={"sub": user.id.hex})
+            new_refresh_token = security.create_refresh_token(data={"sub": user.id.hex})
             
             # 更新数据库（token 轮换）
-            user.refresh_token = security.create_hash(new_refresh_token)
+            user.refresh_token = security.hash_refresh_token(new_refresh_token)
             await self.db.commit()
+            user_cache.invalidate_user(user.id)
                     
             # 写入 HttpOnly Cookie
             security.set_refresh_token_cookie(response, new_refresh_token)
@@ -371,6 +378,7 @@ class UserService:
             user.refresh_token = ""
             self.db.add(user)
             await self.db.commit()
+            user_cache.invalidate_user(user.id)
             logger.info(f"Refresh token revoked for user {user.username or 'Unknown'}")
             
         except NotFoundError:
@@ -492,12 +500,13 @@ class UserService:
     async def _update_password(self, user: User, new_password: str) -> dict[str, str]:
         """统一密码更新逻辑"""
         try:
-            user.hashed_password = security.create_hash(new_password)
+            user.hashed_password = await asyncio.to_thread(security.create_hash, new_password)
             user.refresh_token = ""  # 清空 refresh_token，强制重新登录
             
             self.db.add(user)
             
             await self.db.commit()
+            user_cache.invalidate_user(user.id)
             await self.db.refresh(user)
        
         except IntegrityError as e:
@@ -525,11 +534,12 @@ class UserService:
         if not old_password or not new_password:
             raise ValidationError("Missing old or new password")
         
-        if not security.verify_hash(old_password, user.hashed_password):
+        # bcrypt 校验为 CPU 密集操作，放到线程中执行，避免阻塞事件循环
+        if not await asyncio.to_thread(security.verify_hash, old_password, user.hashed_password):
             logger.warning(f"Incorrect old password provided for user {user.username}")
             raise AuthenticationError("Old password is incorrect")
         
-        if security.verify_hash(new_password, user.hashed_password):
+        if await asyncio.to_thread(security.verify_hash, new_password, user.hashed_password):
             raise AuthenticationError("New password cannot be the same as the old password")
         
         await self._update_password(user, new_password)
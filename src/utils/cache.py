@@ -0,0 +1,102 @@
+# utils/cache.py
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterable, Tuple
+from uuid import UUID
+
+from src.utils.redis_client import get_redis, get_sync_redis
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "v1"
+LOCK_TTL = 2                # 单飞锁过期时间（秒），防止持锁请求异常退出后锁无法释放
+LOCK_WAIT_INTERVAL = 0.05   # 未抢到锁时轮询缓存的间隔（秒）
+LOCK_WAIT_ROUNDS = 20       # 最多轮询次数，超出后直接查询数据库
+
+
+def _json_default(obj: Any) -> Any:
+    """与 FastAPI 响应序列化保持一致：时间转 ISO 格式，UUID/枚举转字符串"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def _version_key(namespace: str, ident: str) -> str:
+    return f"{CACHE_PREFIX}:{namespace}:ver:{ident}"
+
+
+async def get_or_load(
+    namespace: str,
+    ident: str,
+    suffix: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Callable[[Any], int],
+) -> Any:
+    """
+    cache-aside 读取：命中则直接返回缓存，未命中时由单个请求回源并回填
+
+    - 缓存键包含 (namespace, ident) 的版本号，数据变更时递增版本号即可整体失效，无需 SCAN 删除
+    - 回源时使用 SET NX 单飞锁，避免缓存过期瞬间大量请求同时打到数据库
+    - Redis 不可用时直接回源，不影响接口可用性
+    """
+    try:
+        client = get_redis()
+        version = await client.get(_version_key(namespace, ident))
+        key = f"{CACHE_PREFIX}:{namespace}:{ident}:{int(version or 0)}:{suffix}"
+        cached = await client.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        lock_key = f"{key}:lock"
+        acquired = await client.set(lock_key, "1", nx=True, ex=LOCK_TTL)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {namespace}:{ident}, falling back to loader: {e}")
+        return await loader()
+
+    if not acquired:
+        # 其他请求正在回填，短暂等待其结果
+        try:
+            for _ in range(LOCK_WAIT_ROUNDS):
+                await asyncio.sleep(LOCK_WAIT_INTERVAL)
+                cached = await client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Cache wait failed for {key}: {e}")
+        return await loader()
+
+    try:
+        value = await loader()
+        try:
+            await client.set(key, json.dumps(value, default=_json_default), ex=ttl(value))
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+    finally:
+        try:
+            await client.delete(lock_key)
+        except Exception:
+            pass
+
+
+def bump_versions_sync(items: Iterable[Tuple[str, str]]) -> None:
+    """递增 (namespace, ident) 的缓存版本号，使其下所有缓存失效（供同步代码调用）"""
+    keys = {_version_key(namespace, ident) for namespace, ident in items}
+    if not keys:
+        return
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+    except Exception as e:
+        # 失效失败时依赖缓存 TTL 兜底
+        logger.warning(f"Failed to bump cache versions {keys}: {e}")
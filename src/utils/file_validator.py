@@ -1,16 +1,24 @@
 import sys
+import asyncio
 import re
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Union, BinaryIO
+from typing import Dict, Union, BinaryIO, Optional
 
 from src.core.exceptions import ValidationError
 
 
 logger = logging.getLogger(__name__)
 
-ALLOWED_EXTENSIONS = {".pdf", ".docx", ".txt", ".md", ".pptx", ".xlsx"}
+ALLOWED_EXTENSIONS = frozenset({".pdf", ".docx", ".txt", ".md", ".pptx", ".xlsx"})
+
+# 由允许的扩展名预编译匹配规则，校验时无需构造 Path 对象
+# 使用 fullmatch：要求扩展名前有文件名主体（与 Path.suffix 一致），且不允许末尾换行等多余字符
+_ALLOWED_EXT_RE = re.compile(
+    r".+(%s)" % "|".join(re.escape(ext) for ext in sorted(ALLOWED_EXTENSIONS)),
+    re.IGNORECASE,
+)
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
@@ -85,19 +93,21 @@ async def validate_file_extension(filename: str) -> Union[str, None]:
     :param filename: 文件名
     :return: 文件扩展名，如果文件扩展名无效则返回None
     """
-    # print("filename: ", filename)
+    match = _ALLOWED_EXT_RE.fullmatch(filename)
+    if match:
+        return match.group(1).lower()
+
+    # 仅在校验失败时解析实际扩展名，用于错误信息
     ext = Path(filename).suffix.lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        logger.error(f"File type not allowed: {ext}")
-        raise ValidationError(
-            message=f"File type not allowed: {ext}",
-            details={
-                "filename": filename,
-                "extension": ext,
-                "allowed_extensions": list(ALLOWED_EXTENSIONS),
-            }
-        )
-    return ext
+    logger.error(f"File type not allowed: {ext}")
+    raise ValidationError(
+        message=f"File type not allowed: {ext}",
+        details={
+            "filename": filename,
+            "extension": ext,
+            "allowed_extensions": sorted(ALLOWED_EXTENSIONS),
+        }
+    )
 
 
 def validate_file_size(file, max_size: int = MAX_FILE_SIZE) -> int:
@@ -131,45 +141,48 @@ def validate_file_size(file, max_size: int = MAX_FILE_SIZE) -> int:
     return file_size
 
 
-async def validate_file_size_async(file_obj: BinaryIO, max_size: int = MAX_FILE_SIZE) -> int:
+def _measure_file_size(file_obj: BinaryIO) -> int:
+    """通过 seek/tell 获取文件大小，不读取内容，并恢复原文件指针位置"""
+    original_pos = file_obj.tell()
+    try:
+        file_obj.seek(0, 2)
+        return file_obj.tell()
+    finally:
+        file_obj.seek(original_pos)
+
+
+async def validate_file_size_async(
+    file_obj: BinaryIO,
+    max_size: int = MAX_FILE_SIZE,
+    size: Optional[int] = None,
+) -> int:
     """
-    校验文件大小并返回实际字节长度（边读边校验，避免全读入内存）
-    :param file: file-like object
+    校验文件大小并返回实际字节长度
+    :param file_obj: file-like object
     :param max_size: 最大文件大小（字节）
+    :param size: 已知的文件大小（如 UploadFile.size），为空时通过 seek/tell 获取
     :return: 实际文件大小（字节）
     """
-    total_size = 0
-    original_pos = file_obj.tell() if hasattr(file_obj, 'tell') else 0  # 获取当前文件指针位置
-    
-    try:
-        while True:
-            chunk = file_obj.read(1024 * 8)  # 读取8KB的块
-            if not chunk:
-                break
-            total_size += len(chunk)
-            if total_size > max_size:
-                raise ValidationError(
-                    message=f"File size exceeds limit ({max_size}) bytes",
-                    details={
-                        "current_size": total_size,
-                        "max_size": max_size
-                    }
-                )
-        if total_size == 0:
+    if size is None:
+        try:
+            # 上传文件可能已溢出到磁盘，seek/tell 放到线程中执行，不阻塞事件循环
+            size = await asyncio.to_thread(_measure_file_size, file_obj)
+        except (IOError, OSError) as e:
             raise ValidationError(
-                message="File size cannot be empty",
+                message="Failed to read file",
+                details={"error": str(e)}
             )
-        return total_size
-    
-    except IOError as e:
+
+    if size == 0:
         raise ValidationError(
-            message="Failed to read file",
-            details={"error": str(e)}
+            message="File size cannot be empty",
         )
-    finally:
-        # 尝试重置文件指针位置
-        if hasattr(file_obj, 'seek'):
-            try:
-                file_obj.seek(original_pos)
-            except (IOError, OSError) as e:
-                logger.warning(f"Failed to reset file pointer: {e}")     
+    if size > max_size:
+        raise ValidationError(
+            message=f"File size exceeds limit ({max_size}) bytes",
+            details={
+                "current_size": size,
+                "max_size": max_size
+            }
+        )
+    return size
@@ -7,7 +7,8 @@ from minio.lifecycleconfig import NoncurrentVersionExpiration
 from minio.deleteobjects import DeleteObject
 from minio.error import S3Error, InvalidResponseError, ServerError
 from minio.helpers import ObjectWriteResult
-from typing import Optional, Dict, BinaryIO, Iterator, Any
+from typing import Optional, Dict, BinaryIO, Iterator, Any, List, Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime, timezone
 from uuid import UUID
 from urllib import parse
@@ -20,6 +21,9 @@ from src.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_PART_SIZE = 8 * 1024 * 1024  # 分片上传的分片大小（S3 要求最小 5MB）
+LIST_MAX_WORKERS = 16  # 并行列举对象时的最大并发请求数
+
 
 class MinioClient:
     def __init__(
@@ -233,17 +237,24 @@ class MinioClient:
             logging.error(f"Unexpected error during upload: {exc}", exc_info=True)
             raise
     
-    # TODO: 实现上传文件对象的方法
     def upload_fileobj(
         self,
         object_name: str,
         data: BinaryIO,
-        length: int,
+        length: int = -1,
+        part_size: int = UPLOAD_PART_SIZE,
         content_type: str = "application/octet-stream",
         metadata: Optional[dict] = None,
-    ) -> bool:
+    ) -> ObjectWriteResult:
         """
-        上传文件对象（如 BytesIO）
+        流式上传文件对象（如 UploadFile.file / BytesIO），超过分片大小时自动使用分片上传
+        :param object_name: 对象名称（在桶中的路径）
+        :param data: 可读的文件对象
+        :param length: 数据长度，未知时传 -1（此时按 part_size 分片上传）
+        :param part_size: 分片大小（字节）
+        :param content_type: 内容类型
+        :param metadata: 自定义元数据（键值对需为 ASCII）
+        :return: 上传结果对象，包含 etag\version_id 等信息
         """
         try:
             result = self.client.put_object(
@@ -251,16 +262,32 @@ class MinioClient:
                 object_name=object_name,
                 data=data,
                 length=length,
-                metadata=metadata,
+                part_size=part_size,
+                content_type=content_type,
+                metadata=self._encode_metadata(metadata),
             )
-            logger.info(f"File object uploaded: {object_name}")
-            return True
-        except S3Error as e:
-            logger.error(f"S3 uploaded failed: {e.code} - {e.message}")
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error during file object upload: {e}", exc_info=True)
-            return False
+            logger.info(
+                "Object stream upload completed",
+                extra={
+                    "operation": "upload",
+                    "bucket": self.bucket_name,
+                    "object_key": object_name,
+                    "version_id": result.version_id,
+                    "etag": result.etag,
+                    "content_type": content_type,
+                }
+            )
+            return result
+        
+        except S3Error as exc:
+            logger.error(f"S3 error during stream upload: {exc.code} - {exc.message}")
+            raise
+        except (ServerError, InvalidResponseError) as exc:
+            logger.warning(f"Transient error during stream upload: {type(exc).__name__}: {exc}")
+            raise
+        except Exception as exc:
+            logger.error(f"Unexpected error during stream upload: {exc}", exc_info=True)
+            raise
         
     def _generate_trash_key(self, original_key: str) -> str:
         """
@@ -653,11 +680,58 @@ class MinioClient:
             logger.error(f"Unexpected error listing objects: {e}", exc_info=True)
             raise
         
-    def get_object(self, storage_key: str) -> Any:
+    def list_objects_parallel(
+        self,
+        prefix: Optional[str] = None,
+        max_workers: int = LIST_MAX_WORKERS,
+        transform: Optional[Callable[[Any], Any]] = None,
+    ) -> List[Any]:
+        """
+        按下一级目录划分前缀，并发递归列举对象
+        - 先以非递归方式列出 prefix 下的直接对象和子目录（公共前缀）
+        - 各子目录互不重叠，分别递归分页列举后合并，无需去重
+        - SDK 按服务端上限（每页 1000 条）自动翻页；transform 在各列举线程中随翻页逐条执行
+        """
+        convert = transform or (lambda obj: obj)
+        try:
+            top_level = list(self.client.list_objects(
+                self.bucket_name,
+                prefix=prefix,
+                recursive=False,
+                include_version=True,
+            ))
+            objects = [convert(obj) for obj in top_level if not obj.is_dir]
+            sub_prefixes = [obj.object_name for obj in top_level if obj.is_dir]
+            if not sub_prefixes:
+                return objects
+
+            def list_prefix(sub_prefix: str) -> List[Any]:
+                return [convert(obj) for obj in self.client.list_objects(
+                    self.bucket_name,
+                    prefix=sub_prefix,
+                    recursive=True,
+                    include_version=True,
+                )]
+
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(sub_prefixes))) as pool:
+                for part in pool.map(list_prefix, sub_prefixes):
+                    objects.extend(part)
+            return objects
+        except S3Error as e:
+            logger.error(f"S3Error listing objects: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error listing objects: {e}", exc_info=True)
+            raise
+
+    def get_object(self, storage_key: str, offset: int = 0, length: int = 0) -> Any:
+        """获取对象内容流，offset/length 用于按字节范围读取（length 为 0 表示读到末尾）"""
         try:
             return self.client.get_object(
                 bucket_name=self.bucket_name,
-                object_name=storage_key
+                object_name=storage_key,
+                offset=offset,
+                length=length,
             )
         except S3Error as e:
             logger.error(f"Failed to get object {storage_key}: {e}")
@@ -694,3 +768,20 @@ class MinioClient:
         except Exception as e:
             logger.error(f"Unexpected error generating presigned URL: {e}", exc_info=True)
             raise
+
+
+_shared_client: Optional[MinioClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_minio_client() -> MinioClient:
+    """
+    获取进程内共享的 MinioClient（首次调用时创建）
+    - 底层 urllib3 连接池线程安全，复用 keep-alive 连接和已确认存在的桶缓存
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = MinioClient()
+    return _shared_client
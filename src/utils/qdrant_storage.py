@@ -40,8 +40,8 @@ class QdrantClient:
         client_kwargs = {
             "url": settings.QDRANT_SERVER_URL,
             "api_key": settings.QDRANT_API_KEY.get_secret_value(),
-            "https": settings.QDRANT_SERVER_URL.startswith("https"),  # 根据URL动态设置
-            "verify": settings.QDRANT_SERVER_URL.startswith("https"),  # HTTPS时启用证书验证
+            "https": settings.QDRANT_USE_HTTPS,  # 根据URL动态设置
+            "verify": settings.QDRANT_USE_HTTPS,  # HTTPS时启用证书验证
             "prefer_grpc": False,  # 禁用 gRPC，仅使用 HTTP
             "timeout": 10,  # 设置超时时间（秒）
             "trust_env": False,  # 禁用环境变量中的代理设置
@@ -0,0 +1,41 @@
+# utils/rate_limit.py
+import logging
+from typing import Optional
+
+from src.utils.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# 固定窗口计数：INCR 与首次 EXPIRE 在 Lua 脚本中原子执行，返回 [当前计数, 窗口剩余秒数]
+_FIXED_WINDOW_LUA = """
+local n = redis.call('INCR', KEYS[1])
+if n == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return {n, redis.call('TTL', KEYS[1])}
+"""
+
+_script = None
+
+
+async def hit(key: str, limit: int, window: int) -> Optional[int]:
+    """
+    记录一次请求并检查是否超过限额
+    :param key: 限流键
+    :param limit: 窗口内允许的最大次数
+    :param window: 窗口长度（秒）
+    :return: 超限时返回建议的重试等待秒数，未超限返回 None（Redis 不可用时放行）
+    """
+    global _script
+    try:
+        if _script is None:
+            _script = get_redis().register_script(_FIXED_WINDOW_LUA)
+        count, ttl = await _script(keys=[key], args=[window])
+    except Exception as e:
+        logger.warning(f"Rate limit check failed for {key}, allowing request: {e}")
+        return None
+
+    if int(count) > limit:
+        return max(int(ttl), 1)
+    return None
@@ -0,0 +1,82 @@
+from typing import Optional
+import redis
+from redis import asyncio as aioredis
+import logging
+
+from src.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 全局共享的异步 Redis 客户端（内部维护连接池，跨请求复用）
+_redis_client: Optional[aioredis.Redis] = None
+# 同步客户端，供 Celery Worker 等同步代码使用
+_sync_redis_client: Optional[redis.Redis] = None
+# Celery Broker 所在 Redis 的异步客户端（用于读取队列长度等）
+_broker_client: Optional[aioredis.Redis] = None
+
+
+def _create_client(module):
+    """
+    按配置创建 Redis 客户端（module 为 redis 或 redis.asyncio）
+    - 优先使用显式配置的 Redis 主机设置
+    - 未配置时回退到 Celery 的 Broker URL
+    """
+    if settings.REDIS_HOST:
+        return module.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT or 6379,
+            db=settings.REDIS_DB or 0,
+            password=settings.REDIS_PASSWORD.get_secret_value() or None,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+    return module.from_url(
+        settings.CELERY_BROKER_URL,
+        socket_timeout=1.0,
+        socket_connect_timeout=1.0,
+    )
+
+
+def get_redis() -> aioredis.Redis:
+    """获取异步 Redis 客户端（首次调用时创建）"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = _create_client(aioredis)
+        logger.info("Async Redis client initialized")
+    return _redis_client
+
+
+def get_sync_redis() -> redis.Redis:
+    """获取同步 Redis 客户端（首次调用时创建）"""
+    global _sync_redis_client
+    if _sync_redis_client is None:
+        _sync_redis_client = _create_client(redis)
+        logger.info("Sync Redis client initialized")
+    return _sync_redis_client
+
+
+def get_broker_redis() -> aioredis.Redis:
+    """获取 Celery Broker 的异步 Redis 客户端（首次调用时创建）"""
+    global _broker_client
+    if _broker_client is None:
+        _broker_client = aioredis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+        logger.info("Async broker Redis client initialized")
+    return _broker_client
+
+
+async def close_redis() -> None:
+    """关闭 Redis 客户端并释放连接池"""
+    global _redis_client, _broker_client
+    for client in (_redis_client, _broker_client):
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+    _redis_client = None
+    _broker_client = None
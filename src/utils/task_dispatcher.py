@@ -0,0 +1,96 @@
+# utils/task_dispatcher.py
+import asyncio
+import contextvars
+import logging
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from src.core.exceptions import ExternalServiceError
+
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_QUEUE_SIZE = 1000  # 待投递任务的最大缓冲数，超出时拒绝新任务
+DISPATCH_WORKERS = 4        # 并发投递的消费者数量
+DISPATCH_DRAIN_TIMEOUT = 10  # 应用退出时等待缓冲任务投递完成的最长时间（秒）
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+def submit(
+    signature,
+    on_error: Optional[Callable[[], Awaitable[None]]] = None,
+    task_id: Optional[str] = None,
+) -> str:
+    """
+    将 Celery 签名（单个任务或任务链）放入投递缓冲队列，立即返回预先生成的任务 ID
+    - 实际的 apply_async（同步访问 Broker）由后台消费者在线程中完成，不阻塞请求
+    - 缓冲队列已满时抛出 ExternalServiceError（503）
+    :param signature: Celery 签名或 chain
+    :param on_error: 投递失败时执行的异步回调（如释放在途标记）
+    :param task_id: 调用方预先生成的任务 ID，为空时自动生成
+    :return: 任务 ID（chain 为最后一个任务的 ID，与 apply_async 返回值一致）
+    """
+    if _queue is None:
+        raise ExternalServiceError(service_name="Celery", message="Task dispatcher is not running")
+
+    task_id = task_id or str(uuid.uuid4())
+    # 保存当前上下文（request_id 等），投递时在同一上下文中执行，保证 headers 透传
+    ctx = contextvars.copy_context()
+    try:
+        _queue.put_nowait((signature, task_id, ctx, on_error))
+    except asyncio.QueueFull:
+        logger.warning("Task dispatch queue is full, rejecting submission")
+        raise ExternalServiceError(service_name="Celery", message="Task queue is busy, please retry later")
+    return task_id
+
+
+async def _run_on_error(task_id: str, on_error: Optional[Callable[[], Awaitable[None]]]) -> None:
+    if on_error is None:
+        return
+    try:
+        await on_error()
+    except Exception:
+        logger.warning(f"Dispatch error callback failed for task {task_id}", exc_info=True)
+
+
+async def _consume() -> None:
+    while True:
+        signature, task_id, ctx, on_error = await _queue.get()
+        try:
+            await asyncio.to_thread(ctx.run, signature.apply_async, task_id=task_id)
+        except Exception as e:
+            logger.error(f"Failed to dispatch task {task_id}: {e}", exc_info=True)
+            await _run_on_error(task_id, on_error)
+        finally:
+            _queue.task_done()
+
+
+def start_dispatcher(workers: int = DISPATCH_WORKERS) -> None:
+    """启动投递消费者（在应用 lifespan 启动阶段调用）"""
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+    _workers.extend(asyncio.create_task(_consume()) for _ in range(workers))
+
+
+async def stop_dispatcher() -> None:
+    """停止投递消费者：先尽量投递完缓冲中的任务，再取消消费者"""
+    global _queue
+    if _queue is None:
+        return
+    try:
+        await asyncio.wait_for(_queue.join(), timeout=DISPATCH_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Task dispatch queue not drained on shutdown, {_queue.qsize()} task(s) dropped")
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    # 未投递的任务按投递失败处理，执行各自的失败回调（释放在途标记、清理已上传对象等）
+    while not _queue.empty():
+        _, task_id, _, on_error = _queue.get_nowait()
+        await _run_on_error(task_id, on_error)
+    _queue = None
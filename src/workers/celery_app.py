@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, task_postrun
 from redis import Redis
 from redis.connection import ConnectionPool
 import logging, logging.config
@@ -10,6 +11,8 @@ from src.config.settings import settings
 from src.config.logging import logging_config
 from src.config.logging import setup_log_record_factory
 from src.workers import celery_config
+from src.middleware.request_id import request_id_ctx_var, task_id_ctx_var
+from src.workers.system.request_id_helper import set_request_id_from_task
 
 # 安装自定义 LogRecordFactory
 setup_log_record_factory()  
@@ -174,6 +177,30 @@ celery_app.conf.update(
 )
 
 
+# request_id 链路透传：
+# - 发布任务时自动把当前上下文中的 request_id 写入消息 headers（API 进程和 Worker 中发布的后续任务均适用）
+# - Worker 执行任务前从 headers 恢复 request_id 到上下文，日志与链路中的下一个任务即可自动关联
+@before_task_publish.connect
+def inject_request_id_header(headers=None, **kwargs):
+    request_id = request_id_ctx_var.get()
+    if request_id and headers is not None and not headers.get("request_id"):
+        headers["request_id"] = request_id
+
+
+@task_prerun.connect
+def restore_request_id(task_id=None, task=None, **kwargs):
+    # 先清空，避免同一 Worker 上一个任务的 request_id 泄漏到当前任务
+    request_id_ctx_var.set(None)
+    set_request_id_from_task(task)
+    # 日志直接读取上下文中的 task_id，不再每条记录访问 celery.current_task
+    task_id_ctx_var.set(task_id)
+
+
+@task_postrun.connect
+def clear_task_id(**kwargs):
+    task_id_ctx_var.set(None)
+
+
 # 自动发现任务（推荐）
 # celery_app.autodiscover_tasks(["src.workers.user.email_notification"])
 # celery_app.autodiscover_tasks(["src.workers.document.object_storage"])
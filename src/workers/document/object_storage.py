@@ -4,7 +4,6 @@ import mimetypes
 import logging
 import asyncio
 from celery import group
-from pathlib import Path
 from typing import Optional
 from datetime import datetime, timezone, timedelta
 from uuid import UUID
@@ -64,8 +63,7 @@ def upload_document_task(
     self, 
     user_id: str,
     # doc_id: Optional[str],
-    filename: str,
-    temp_path: str, 
+    upload_info: dict,
 ) -> Optional[dict]:
     
     task_id = self.request.id   # Celery 任务 ID
@@ -76,7 +74,8 @@ def upload_document_task(
     
     job_crud = DocumentJobCRUD()
     
-    logger.info(f"[Req: {request_id}][Task: {task_id}] Starting upload | User={user_id} | File={filename}")
+    storage_key = upload_info["storage_key"]
+    logger.info(f"[Req: {request_id}][Task: {task_id}] Starting upload | User={user_id} | File={upload_info['filename']}")
     
     try:
         with get_sync_db() as db_session:
@@ -85,14 +84,10 @@ def upload_document_task(
                 db=db_session,
                 user_id=UUID(user_id),
                 # doc_id=UUID(doc_id) if doc_id else None,
-                filename=filename,
-                temp_path=Path(temp_path),
+                upload_info=upload_info,
                 context=context,
             )
             
-            # 清理临时文件
-            cleanup_temp_file(Path(temp_path))
-            
             return {
                 "status": "success",
                 "task_id": task_id,
@@ -114,29 +109,34 @@ def upload_document_task(
             }
         
     except (ResourceConflictError, BusinessLogicError, ValidationError) as e:
-        # 业务错误，不需要重试
-        cleanup_temp_file(Path(temp_path))
+        # 业务错误，不需要重试；文档未登记，清理已上传的对象
+        cleanup_uploaded_object(storage_key)
         logger.error(f"Failed to upload document: via task: {task_id}. Business error: {str(e)}", exc_info=True)
         raise
     except (ExternalServiceError, DatabaseError) as retry_exc:
+        if self.request.retries >= self.max_retries:
+            # 重试次数用尽，任务最终失败；文档未登记，清理已上传的对象
+            cleanup_uploaded_object(storage_key)
+            logger.error(f"Failed to upload document: via task: {task_id}. Retries exhausted: {retry_exc}")
+            raise retry_exc
         # 处理 Celery 相关的重试逻辑
         logger.warning(f"[Retry {self.request.retries + 1}/{self.max_retries}] Network error: {retry_exc}")
         raise self.retry(exc=retry_exc)
     except Exception as e:
-        cleanup_temp_file(Path(temp_path))
+        cleanup_uploaded_object(storage_key)
         logger.error(f"Failed to upload document: via task: {task_id}. Error: {str(e)}", exc_info=True)
         raise
     
-def cleanup_temp_file(path: Path):
+def cleanup_uploaded_object(storage_key: str):
         """
-        清理临时文件
+        清理 API 已上传但未能登记到数据库的对象
         """
         try:
-            if path and path.exists():
-                path.unlink()
-                logger.info(f"Cleaned up temp file: {path}")
+            if storage_key:
+                minio_client.permanent_delete_document(object_name=storage_key)
+                logger.info(f"Cleaned up uploaded object: {storage_key}")
         except Exception as e:
-            logger.warning(f"Failed to cleanup temp file {path}: {e}")
+            logger.warning(f"Failed to cleanup uploaded object {storage_key}: {e}")
     
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
 def soft_delete_document_task(
@@ -530,6 +530,20 @@ def permanent_delete_from_s3_task(self, user_id: str, storage_key: str):
         raise
     
    
+def _object_summary(obj) -> dict:
+    """将 MinIO 对象转换为任务结果中的字典"""
+    return {
+        "object_name": obj.object_name,
+        "last_modified": obj.last_modified,
+        "etag": obj.etag,
+        'size': obj.size,
+        "metadata": obj.metadata,
+        "version_id": obj.version_id,
+        "is_latest": obj.is_latest,
+        "is_delete_marker": obj.is_delete_marker,
+    }
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)        
 def list_objects_from_s3_task(self, prefix: Optional[str] = None, recursive: bool = True):
     """
@@ -537,20 +551,12 @@ def list_objects_from_s3_task(self, prefix: Optional[str] = None, recursive: boo
     """
     task_id = self.request.id
     set_request_id_from_task(self)  # 从 Celery 任务中恢复 request_id 到当前进程的上下文
-    objects = []
     try:
-        list_objects = minio_client.list_objects(prefix=prefix, recursive=recursive)
-        for obj in list_objects:
-            objects.append({
-                "object_name": obj.object_name,
-                "last_modified": obj.last_modified,
-                "etag": obj.etag,
-                'size': obj.size,
-                "metadata": obj.metadata,
-                "version_id": obj.version_id,
-                "is_latest": obj.is_latest,
-                "is_delete_marker": obj.is_delete_marker,  
-            })
+        if recursive:
+            # 按子目录并发列举，避免大桶顺序分页；对象摘要在各列举线程中随翻页生成
+            objects = minio_client.list_objects_parallel(prefix=prefix, transform=_object_summary)
+        else:
+            objects = [_object_summary(obj) for obj in minio_client.list_objects(prefix=prefix, recursive=False)]
             
         objects.sort(key=lambda obj: obj["last_modified"], reverse=True)
         # sorted_objects = sorted(objects, key=lambda obj: obj['last_modified'], reverse=True)
@@ -0,0 +1,25 @@
+# workers/document/pipelines.py
+from typing import Any, Dict
+
+from celery import chain
+from celery.canvas import Signature
+
+from src.workers.document.object_storage import upload_document_task
+from src.workers.document.vector_storage import process_document_task
+
+
+def document_ingest_pipeline(
+    user_id: str,
+    upload_info: Dict[str, Any],
+    auto_vectorize: bool = True,
+) -> Signature:
+    """
+    构建文档入库任务编排
+    - auto_vectorize=True：登记文档 -> 文本提取及向量化（后者接收前者的返回值）
+    - auto_vectorize=False：仅登记文档
+    request_id 由 Celery 的 before_task_publish 信号统一写入消息 headers，此处无需设置
+    """
+    upload_sig = upload_document_task.si(user_id=user_id, upload_info=upload_info)
+    if not auto_vectorize:
+        return upload_sig
+    return chain(upload_sig, process_document_task.s())
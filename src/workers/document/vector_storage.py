@@ -10,6 +10,7 @@ from src.core.database import get_sync_db
 from src.crud.document_job import DocumentJobCRUD
 from src.utils.minio_storage import MinioClient
 from src.config.settings import settings
+from src.utils.redis_client import get_sync_redis
 from src.services.vector_service import VectorizationService
 from src.core.exceptions import (
     ResourceConflictError,
@@ -30,7 +31,38 @@ minio_client = MinioClient(
     bucket_name=settings.MINIO_BUCKET_NAME
 )
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+# 向量化任务在途标记：API 入队时设置，任务结束（成功或不可重试的失败）时清除
+# 兜底过期时间（秒）：任务被硬超时强制终止时来不及清除标记，TTL 与任务的 time_limit 保持一致
+VECTORIZE_INFLIGHT_TTL = 3600
+
+
+def vectorize_inflight_key(doc_id) -> str:
+    return f"inflight:vectorize:{doc_id}"
+
+
+# 比较后删除：标记值为提交的任务 ID，只有标记仍属于该任务时才删除，
+# 避免上传任务链中的向量化步骤或其他任务误删 /vectorize 请求设置的标记
+VECTORIZE_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_script = None
+
+
+def clear_vectorize_inflight(doc_id, task_id: str) -> None:
+    global _release_script
+    try:
+        if _release_script is None:
+            _release_script = get_sync_redis().register_script(VECTORIZE_RELEASE_LUA)
+        _release_script(keys=[vectorize_inflight_key(doc_id)], args=[task_id])
+    except Exception as e:
+        logger.warning(f"Failed to clear vectorize in-flight marker for {doc_id}: {e}")
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, time_limit=VECTORIZE_INFLIGHT_TTL)
 def process_document_task(self, previous_result: Dict[str, Any]) -> Dict[str, Any]:
     """
     处理文档向量化任务
@@ -65,6 +97,7 @@ def process_document_task(self, previous_result: Dict[str, Any]) -> Dict[str, An
             )
             
         logger.info(f"Document vectorization task finished for doc: {doc_id}, via task: {task_id}")
+        clear_vectorize_inflight(doc_id, task_id)
         
         return {
             "status": "success",
@@ -81,9 +114,15 @@ def process_document_task(self, previous_result: Dict[str, Any]) -> Dict[str, An
     except (BusinessLogicError, ResourceConflictError, DatabaseError) as e:
         # 业务错误，不需要重试
         logger.error(f"Failed to process document: {doc_id}, via task: {task_id}. error: {str(e)}", exc_info=True)
+        clear_vectorize_inflight(doc_id, task_id)
         raise
     except (ExternalServiceError) as retry_exc:
         # 处理 Celery 相关的重试逻辑
+        if self.request.retries >= self.max_retries:
+            # 重试次数用尽，任务最终失败，清除在途标记以便重新提交
+            logger.error(f"Giving up vectorization for doc: {doc_id}, via task: {task_id}. error: {retry_exc}")
+            clear_vectorize_inflight(doc_id, task_id)
+            raise retry_exc
         logger.warning(f"[Retry {self.request.retries + 1}/{self.max_retries}] Network error: {retry_exc}")
         raise self.retry(exc=retry_exc)
         # retry_job = retry_exc.details.get("retry_job_id")
@@ -101,4 +140,5 @@ def process_document_task(self, previous_result: Dict[str, Any]) -> Dict[str, An
         #         raise cause
     except Exception as e:
         logger.error(f"Failed to process document: {doc_id}, via task: {task_id}. error: {str(e)}", exc_info=True)
+        clear_vectorize_inflight(doc_id, task_id)
         raise